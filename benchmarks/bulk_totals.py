@@ -0,0 +1,61 @@
+"""
+Benchmark: totals for 10k user-months with timesheet_bulk.compute_totals versus compute_timesheet
+per user, checking that both give exactly the same totals.
+
+    python -m benchmarks.bulk_totals [user-months]
+"""
+import logging
+import random
+import sys
+import time
+from leave_calendar import DAYS_IN_MONTH, format_leave_date
+from timesheet_bulk import COLUMNS, compute_totals
+from timesheet_model import compute_timesheet
+
+YEAR = 2025
+LEAVE_TYPES = ("Annual Leave", "Sick Leave", "Childcare Leave", "NS Leave", "Half Day", "Weekend Efforts",
+               "Public Holiday Efforts", "Half Day Efforts")
+
+
+def random_leaves(rng, month):
+    """Up to 6 leaves, mostly in `month`, some spilling into the next month."""
+    leaves = []
+    for _ in range(rng.randint(0, 6)):
+        start = rng.randint(1, DAYS_IN_MONTH[month] - 1 if month == 2 else DAYS_IN_MONTH[month])
+        end_month = month if month == 12 or rng.random() < 0.9 else month + 1
+        end = rng.randint(start, DAYS_IN_MONTH[month]) if end_month == month else rng.randint(1, 5)
+        leaves.append((format_leave_date(month, start), format_leave_date(end_month, end), rng.choice(LEAVE_TYPES)))
+    return leaves
+
+
+def main(user_months=10000):
+    logging.disable(logging.ERROR)  # The scalar engine logs every leave entry
+    rng = random.Random(1)
+    by_month = {month: ([], []) for month in range(1, 13)}
+    for index in range(user_months):
+        month = index % 12 + 1
+        profiles, leaves = by_month[month]
+        profiles.append({"timesheet_preference": rng.choice(("1.0", "8.5", "1.0", "0.8"))})
+        leaves.append(random_leaves(rng, month))
+
+    start = time.perf_counter()
+    bulk = {month: compute_totals(profiles, YEAR, month, leaves) for month, (profiles, leaves) in by_month.items()}
+    bulk_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    scalar = {month: [compute_timesheet(profile, YEAR, month, user_leaves).totals
+                      for profile, user_leaves in zip(*by_month[month])] for month in by_month}
+    scalar_seconds = time.perf_counter() - start
+
+    mismatches = 0
+    for month, (totals, ns_leave_present) in bulk.items():
+        for row, present, expected in zip(totals.tolist(), ns_leave_present, scalar[month]):
+            got = dict(zip(COLUMNS if present else COLUMNS[:-1], row))
+            mismatches += got != expected
+    print(f"{user_months} user-months: bulk {bulk_seconds * 1000:.1f} ms, scalar {scalar_seconds * 1000:.1f} ms "
+          f"({scalar_seconds / bulk_seconds:.0f}x), {mismatches} mismatching totals")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(*(int(arg) for arg in sys.argv[1:])))
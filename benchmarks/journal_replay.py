@@ -0,0 +1,63 @@
+"""
+Benchmark: startup replay of the journal user store (100k journal entries by default) compared with
+loading the same users from a compacted snapshot, checking that both give the same users.
+
+    python -m benchmarks.journal_replay [entries]
+"""
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from utils.utils import JournalUserStore
+
+FIELDS = ("name", "skill_level", "role_specialization", "group_specialization", "contractor", "po_ref",
+          "po_date", "description", "reporting_officer", "timesheet_preference")
+
+
+def write_journal(file_path, entries, rng):
+    """Registrations field by field, some re-registrations and de-registrations, spread over 10k users."""
+    with open(file_path, "w") as file:
+        for _ in range(entries):
+            user_id = str(rng.randrange(10000))
+            if rng.random() < 0.02:
+                entry = {"op": "delete", "user_id": user_id}
+            else:
+                entry = {"op": "set", "user_id": user_id, "field": rng.choice(FIELDS), "value": f"value {rng.random()}"}
+            file.write(json.dumps({"ts": "2025-07-01T09:00:00", **entry}) + "\n")
+
+
+def timed_load(snapshot_path, journal_path):
+    start = time.perf_counter()
+    users = JournalUserStore(snapshot_path, journal_path).load_all()
+    return users, time.perf_counter() - start
+
+
+def main(entries=100000):
+    rng = random.Random(1)
+    with tempfile.TemporaryDirectory() as directory:
+        snapshot_path = os.path.join(directory, "user_details.json")
+        journal_path = os.path.join(directory, "user_details.journal.jsonl")
+        write_journal(journal_path, entries, rng)
+        journal_bytes = os.path.getsize(journal_path)
+
+        sys.stdout = open(os.devnull, "w")  # validate_user_details reports every partial profile
+        try:
+            replayed, replay_seconds = timed_load(snapshot_path, journal_path)
+            JournalUserStore(snapshot_path, journal_path).compact()
+            compacted, snapshot_seconds = timed_load(snapshot_path, journal_path)
+        finally:
+            sys.stdout.close()
+            sys.stdout = sys.__stdout__
+
+    print(f"{entries} journal entries ({journal_bytes / 1024 / 1024:.1f} MiB, {len(replayed)} users): "
+          f"replay {replay_seconds * 1000:.1f} ms, compacted snapshot {snapshot_seconds * 1000:.1f} ms")
+    if replayed != compacted:
+        print("Replayed and compacted users differ")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(*(int(arg) for arg in sys.argv[1:])))
@@ -0,0 +1,58 @@
+"""
+Micro-benchmark: expanding a month of leave entries with strptime/timedelta (the previous code)
+versus the integer (month, day) dates in leave_calendar.
+
+    python -m benchmarks.leave_dates
+"""
+import logging
+import timeit
+from calendar import monthrange
+from datetime import date, datetime, timedelta
+from leave_calendar import expand_leave_days, format_leave_date, leaves_in_month
+
+YEAR, MONTH = 2025, 7
+LEAVE_TYPES = ("Annual Leave", "Sick Leave", "Half Day", "Weekend Efforts", "NS Leave")
+# One single-day leave for every day of the month, plus a few ranges (some crossing into the next month)
+LEAVES = [(format_leave_date(MONTH, day), format_leave_date(MONTH, day), LEAVE_TYPES[day % len(LEAVE_TYPES)])
+          for day in range(1, monthrange(YEAR, MONTH)[1] + 1)]
+LEAVES += [("07-July", "11-July", "Annual Leave"), ("28-July", "05-August", "NS Leave")]
+
+
+def strptime_expand_leave_days(year, month, leave_details):
+    """expand_leave_days as it was before the integer dates (logging left out, as in the benchmark)."""
+    leave_by_day = {}
+    for start_date, end_date, leave_type in leave_details:
+        start = datetime.strptime(start_date, "%d-%B").replace(year=year).date()
+        end = datetime.strptime(end_date, "%d-%B").replace(year=year).date()
+        _, days_in_month = monthrange(year, month)
+        first = max(start, date(year, month, 1))
+        last = min(end, date(year, month, days_in_month))
+        while first <= last:
+            leave_by_day.setdefault(first.day, []).append(leave_type)
+            first += timedelta(days=1)
+    return leave_by_day
+
+
+def strptime_leaves_in_month(leave_details, month):
+    return [entry for entry in leave_details
+            if datetime.strptime(entry[0], "%d-%B").month <= month <= datetime.strptime(entry[1], "%d-%B").month]
+
+
+def bench(label, function, number=2000):
+    seconds = min(timeit.repeat(function, number=number, repeat=5)) / number
+    print(f"{label:<40} {seconds * 1e6:9.1f} us")
+    return seconds
+
+
+if __name__ == "__main__":
+    logging.disable(logging.INFO)  # expand_leave_days logs every entry
+    assert expand_leave_days(YEAR, MONTH, LEAVES) == strptime_expand_leave_days(YEAR, MONTH, LEAVES)
+    assert leaves_in_month(LEAVES, MONTH) == strptime_leaves_in_month(LEAVES, MONTH)
+
+    print(f"{len(LEAVES)} leave entries in {YEAR}-{MONTH:02d}")
+    old = bench("expand_leave_days (strptime)", lambda: strptime_expand_leave_days(YEAR, MONTH, LEAVES))
+    new = bench("expand_leave_days (integer dates)", lambda: expand_leave_days(YEAR, MONTH, LEAVES))
+    print(f"{'speed-up':<40} {old / new:9.1f} x")
+    old = bench("leaves_in_month (strptime)", lambda: strptime_leaves_in_month(LEAVES, MONTH))
+    new = bench("leaves_in_month (integer dates)", lambda: leaves_in_month(LEAVES, MONTH))
+    print(f"{'speed-up':<40} {old / new:9.1f} x")
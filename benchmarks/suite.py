@@ -0,0 +1,202 @@
+"""
+Benchmark suite for generate_timesheet_excel: wall time, peak memory (tracemalloc) and output size
+for representative months, compared against a stored baseline.
+
+    python -m benchmarks.suite                    # run, compare with benchmarks/baseline.json
+    python -m benchmarks.suite --update-baseline  # run and store the results as the new baseline
+    python -m benchmarks.suite --threshold 0.5 --scenario heavy_leave
+
+Scenarios in POOL_SCENARIOS go through timesheet_batch.generate_timesheets (the process pool); their peak
+memory covers the parent process only.
+
+Exits with 1 when a scenario uses more memory or output bytes than baseline * (1 + threshold), or is
+slower than max(baseline * (1 + threshold), baseline + TIME_SLACK_MS): the absolute slack keeps
+scheduler noise on the ~30 ms scenarios from failing the run. Timings depend on the machine: refresh the
+baseline on the machine the suite runs on.
+"""
+import argparse
+import configparser
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from utils import utils
+from timesheet_batch import generate_timesheets
+import timesheet_generator
+
+config = configparser.ConfigParser()
+config.read("config/config.ini")
+REGRESSION_THRESHOLD = config.getfloat("benchmarks", "REGRESSION_THRESHOLD", fallback=0.25)
+TIME_SLACK_SECONDS = config.getfloat("benchmarks", "TIME_SLACK_MS", fallback=10) / 1000
+MIN_TIMED_SECONDS = 1.0
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), "baseline.json")
+METRICS = ("seconds", "peak_bytes", "output_bytes")
+
+YEAR = 2025
+PROFILE = {
+    "name": "Benchmark User",
+    "timesheet_preference": "1.0",
+    "skill_level": "Professional",
+    "role_specialization": "DevOps Engineer - II",
+    "group_specialization": "Platform",
+    "contractor": "Benchmark Pte Ltd",
+    "po_ref": "GVT000ABC1234",
+    "po_date": "1 May 24 - 30",
+    "description": "Agile Co-Development Services",
+    "reporting_officer": "John Doe",
+}
+HEAVY_LEAVE = [
+    ("02-July", "04-July", "Annual Leave"),
+    ("07-July", "07-July", "Sick Leave"),
+    ("08-July", "08-July", "Half Day"),
+    ("09-July", "11-July", "Childcare Leave"),
+    ("12-July", "13-July", "Weekend Efforts"),
+    ("14-July", "18-July", "NS Leave"),
+    ("21-July", "21-July", "Half Day"),
+    ("22-July", "25-July", "Annual Leave"),
+    ("26-July", "27-July", "Weekend Efforts"),
+    ("28-July", "28-July", "Sick Leave"),
+    ("30-July", "31-July", "Annual Leave"),
+]
+
+# name -> ([(profile overrides, leave_details) per user], month)
+BATCH_100_USERS = [({"timesheet_preference": "8.5" if user % 2 else "1.0"}, HEAVY_LEAVE[:user % len(HEAVY_LEAVE)])
+                   for user in range(100)]
+SCENARIOS = {
+    "empty_month": ([({}, [])], 2),
+    "heavy_leave": ([({}, HEAVY_LEAVE)], 7),
+    "ns_leave": ([({}, [("15-September", "19-September", "NS Leave"),
+                        ("22-September", "22-September", "Half Day")])], 9),
+    "preference_8_5": ([({"timesheet_preference": "8.5"}, [("05-June", "05-June", "Half Day"),
+                                                           ("13-June", "13-June", "Half Day"),
+                                                           ("16-June", "17-June", "Annual Leave")])], 6),
+    "month_31_days": ([({}, [("04-August", "04-August", "Sick Leave"),
+                             ("09-August", "09-August", "Weekend Efforts")])], 8),
+    "batch_100_users": (BATCH_100_USERS, 7),
+    "batch_100_users_pool": (BATCH_100_USERS, 7),
+}
+POOL_SCENARIOS = {"batch_100_users_pool"}
+
+
+def _generate(users, month, pool=False):
+    """Generate every user's timesheet in memory (in worker processes with `pool`); returns the total output size."""
+    if pool:
+        # The workers are forked, so they see the benchmark user store and the disabled cache
+        results = list(generate_timesheets(month, YEAR, dict(users), in_memory=True))
+        errors = [f"{result.user_id}: {result.error}" for result in results if result.error]
+        if errors:
+            raise RuntimeError(f"Batch generation failed for {', '.join(errors)}")
+        return sum(len(result.output[1].getvalue()) for result in results)
+    output_bytes = 0
+    for user_id, leave_details in users:
+        _, buffer = timesheet_generator.generate_timesheet_excel(user_id, month, YEAR, leave_details, in_memory=True)
+        output_bytes += len(buffer.getvalue())
+    return output_bytes
+
+
+def run_scenario(users, month, repeat, pool=False):
+    """
+    Best wall time of at least `repeat` runs (short scenarios keep running for MIN_TIMED_SECONDS, so a
+    ~30 ms scenario gets enough runs for one of them to be undisturbed), then one more run under
+    tracemalloc for the peak memory.
+    """
+    _generate(users, month, pool)  # Warm-up: templates, styles and imports are built on the first run
+    best, runs, timed = None, 0, 0.0
+    while runs < repeat or timed < MIN_TIMED_SECONDS:
+        start = time.perf_counter()
+        output_bytes = _generate(users, month, pool)
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+        runs += 1
+        timed += seconds
+
+    tracemalloc.start()
+    _generate(users, month, pool)
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": round(best, 6), "peak_bytes": peak_bytes, "output_bytes": output_bytes}
+
+
+def compare(results, baseline, threshold, time_slack=TIME_SLACK_SECONDS):
+    """
+    Messages for every metric that exceeds baseline * (1 + threshold); wall time may also exceed the
+    baseline by `time_slack` seconds, whichever allows more.
+    """
+    regressions = []
+    for name, result in results.items():
+        for metric in METRICS:
+            expected = baseline.get(name, {}).get(metric)
+            if not expected:
+                continue
+            allowed = expected * (1 + threshold)
+            if metric == "seconds":
+                allowed = max(allowed, expected + time_slack)
+            if result[metric] > allowed:
+                regressions.append(f"{name}: {metric} {result[metric]} > {expected} (up to {allowed:.6g} allowed)")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark timesheet generation against a stored baseline.")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="Only run these scenarios")
+    parser.add_argument("--repeat", type=int, default=5, help="Minimum timed runs per scenario (the best one counts)")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="Allowed growth over the baseline, e.g. 0.25 = 25%% (default from config.ini)")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--update-baseline", action="store_true", help="Store these results as the baseline")
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.INFO)  # Per-leave logging would dominate the timings
+    names = args.scenario or list(SCENARIOS)
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        # Benchmark users live in their own user store, and the cache is off so every run really generates
+        user_file = os.path.join(directory, "user_details.json")
+        profiles, scenarios = {}, {}
+        for name in names:
+            users, month = SCENARIOS[name]
+            scenarios[name] = ([], month)
+            for index, (overrides, leave_details) in enumerate(users):
+                user_id = f"{name}-{index}"
+                profiles[user_id] = dict(PROFILE, **overrides)
+                scenarios[name][0].append((user_id, leave_details))
+        with open(user_file, "w") as file:
+            json.dump(profiles, file)
+
+        saved = utils.user_store, timesheet_generator.timesheet_cache.max_bytes
+        utils.user_store, timesheet_generator.timesheet_cache.max_bytes = utils.JSONUserStore(user_file), 0
+        try:
+            for name in names:
+                results[name] = run_scenario(*scenarios[name], args.repeat, pool=name in POOL_SCENARIOS)
+                print(f"{name:<18} {results[name]['seconds'] * 1000:9.1f} ms "
+                      f"{results[name]['peak_bytes'] / 1024:9.0f} KiB peak {results[name]['output_bytes']:9d} bytes")
+        finally:
+            utils.user_store, timesheet_generator.timesheet_cache.max_bytes = saved
+
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as file:
+                baseline = json.load(file)
+        baseline.update(results)
+        with open(args.baseline, "w") as file:
+            json.dump(baseline, file, indent=4, sort_keys=True)
+        print(f"Baseline updated -> {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --update-baseline first.")
+        return 0
+    with open(args.baseline) as file:
+        regressions = compare(results, json.load(file), args.threshold)
+    for message in regressions:
+        print(f"REGRESSION  {message}")
+    print("FAILED" if regressions else f"OK (within +{args.threshold:.0%} of the baseline)")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
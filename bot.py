@@ -6,6 +6,11 @@ from dotenv import load_dotenv
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import Application, CommandHandler, CallbackQueryHandler, MessageHandler, filters, ContextTypes
 from timesheet_generator import generate_timesheet_excel
+from timesheet_export import generate_timesheet_export
+from leave_calendar import MONTH_NUMBERS, format_leave_date, parse_leave_date
+from phase_timing import PhaseStats, format_timings, record
+from leave_ledger import leave_ledger
+from holiday_calendar import start_polling as start_holiday_polling
 from utils.utils import PUBLIC_HOLIDAYS, load_user_details  # Load dynamically
 from registration import register_new_user, capture_user_details, \
     handle_registration_buttons  # Import the missing function
@@ -38,6 +43,7 @@ config.read("config/config.ini")
 MAX_ATTEMPTS = int(config["rate_limit"]["MAX_ATTEMPTS"])
 TIME_WINDOW = int(config["rate_limit"]["TIME_WINDOW"])
 AWAIT = float(config["race"]["AWAIT"])
+PHASE_TIMING = config.getboolean("timesheet", "PHASE_TIMING", fallback=False)
 
 #print(f"MAX_ATTEMPTS: {MAX_ATTEMPTS}, TIME_WINDOW: {TIME_WINDOW}, AWAIT: {AWAIT}")
 
@@ -57,6 +63,13 @@ if not BOT_TOKEN:
 # In-memory storage for user inputs
 user_leaves = {}
 
+# Generation phase timings added up over every timesheet since start-up (when PHASE_TIMING is on)
+phase_stats = PhaseStats()
+
+# Alternative downloads offered next to every "Generate Timesheet" button (numbers only, no Excel)
+EXPORT_BUTTONS = [InlineKeyboardButton("📄 Numbers only (CSV)", callback_data="export_csv"),
+                  InlineKeyboardButton("🧾 Numbers only (JSON)", callback_data="export_json")]
+
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = str(update.effective_user.id).strip()
     query = update.callback_query  # Capture callback query
@@ -111,7 +124,8 @@ async def month_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     buttons = [
         [InlineKeyboardButton("📝 Apply Leave", callback_data="apply_leave")],
         [InlineKeyboardButton("🔧 Add NS Leave / Weekends Efforts / Half Day Efforts", callback_data="special_efforts")],
-        [InlineKeyboardButton("📊 Generate Timesheet Without Leave", callback_data="generate_timesheet_now")]
+        [InlineKeyboardButton("📊 Generate Timesheet Without Leave", callback_data="generate_timesheet_now")],
+        EXPORT_BUTTONS
     ]
 
     reply_markup = InlineKeyboardMarkup(buttons)
@@ -168,7 +182,8 @@ async def action_completed(update: Update, context: ContextTypes.DEFAULT_TYPE):
         [InlineKeyboardButton("Add Weekend Efforts", callback_data="weekend_efforts")],
         [InlineKeyboardButton("Update Half Day", callback_data="half_day")],
         [InlineKeyboardButton("📝 Apply Leave", callback_data="apply_leave")],
-        [InlineKeyboardButton("📊 Generate Timesheet", callback_data="generate_timesheet_after_leave")]
+        [InlineKeyboardButton("📊 Generate Timesheet", callback_data="generate_timesheet_after_leave")],
+        EXPORT_BUTTONS
     ]
     reply_markup = InlineKeyboardMarkup(buttons)
 
@@ -223,7 +238,7 @@ async def show_start_date_selection(update: Update, context: ContextTypes.DEFAUL
     month = context.user_data.get("month")
     short_month = month[:3]  # Get short month format (e.g., "January" -> "Jan")
     year = datetime.now().year
-    month_number = datetime.strptime(month, "%B").month
+    month_number = MONTH_NUMBERS[month.lower()]
     _, days_in_month = monthrange(year, month_number)
 
     buttons = []
@@ -268,7 +283,7 @@ async def start_date_handler(update: Update, context: ContextTypes.DEFAULT_TYPE)
 
         # Extract and validate the date
         selected_start_date = callback_data.replace("start_date_", "")
-        start_date_obj = datetime.strptime(selected_start_date, "%d-%B")  # Validate format
+        _, start_day = parse_leave_date(selected_start_date, datetime.now().year)  # Validate format
 
         user_id = str(update.effective_user.id)
         month = context.user_data.get("month")
@@ -284,24 +299,23 @@ async def start_date_handler(update: Update, context: ContextTypes.DEFAULT_TYPE)
             user_leaves[user_id][month] = []
 
         # **Check if the selected START DATE overlaps with an existing leave**
+        month_number = MONTH_NUMBERS[month.lower()]
         for existing_start, existing_end, existing_leave_type in user_leaves[user_id][month]:
-            existing_start_date = datetime.strptime(existing_start, "%d-%B")
-            existing_end_date = datetime.strptime(existing_end, "%d-%B")
-
             # Check if the selected start date falls within an existing leave period
-            if existing_start_date <= start_date_obj <= existing_end_date:
+            if existing_start <= start_day <= existing_end:
                 logger.warning(f"User {user_id} attempted overlapping start date: {selected_start_date}")
                 await query.message.reply_text(
                     f"⚠️ The selected START DATE *overlaps* with an existing leave:\n"
-                    f"📅 *{existing_start}* - *{existing_end}* (*{existing_leave_type}*)\n\n"
+                    f"📅 *{format_leave_date(month_number, existing_start)}* - "
+                    f"*{format_leave_date(month_number, existing_end)}* (*{existing_leave_type}*)\n\n"
                     "🔄 *Please select a different START DATE.*",
                     parse_mode="Markdown"
                 )
                 await show_start_date_selection(update, context)  # Prompt for a new start date
                 return  # Stop execution
 
-        # **If no overlap, proceed with storing the start date**
-        context.user_data["start_date"] = selected_start_date
+        # **If no overlap, proceed with storing the start date** (day of month)
+        context.user_data["start_date"] = start_day
         logger.info(f"User {user_id} selected START DATE: {selected_start_date}")
 
         # Move to END DATE selection
@@ -320,7 +334,7 @@ async def show_end_date_selection(update: Update, context: ContextTypes.DEFAULT_
     month = context.user_data.get("month")
     short_month = month[:3]  # Convert "January" -> "Jan"
     year = datetime.now().year
-    month_number = datetime.strptime(month, "%B").month
+    month_number = MONTH_NUMBERS[month.lower()]
     _, days_in_month = monthrange(year, month_number)
 
     buttons = []
@@ -365,23 +379,20 @@ async def end_date_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
         # Extract and validate the date
         selected_end_date = callback_data.replace("end_date_", "")
-        end_date_obj = datetime.strptime(selected_end_date, "%d-%B")  # Convert to datetime object
+        _, end_day = parse_leave_date(selected_end_date, datetime.now().year)  # Day of month
 
         user_id = str(update.effective_user.id)
         month = context.user_data.get("month")
-        start_date = context.user_data.get("start_date")
+        start_day = context.user_data.get("start_date")
         leave_type = context.user_data.get("leave_type")
 
-        if not start_date or not leave_type:
+        if not start_day or not leave_type:
             await query.message.reply_text("⚠️ Missing leave START DATE or Leave Type.\n\nPlease restart using /start.")
             return
 
-        # Convert START DATE to datetime object
-        start_date_obj = datetime.strptime(start_date, "%d-%B")
-
         # **Validation: Check if START DATE is greater than END DATE**
-        if start_date_obj > end_date_obj:
-            logger.warning(f"User {user_id} entered invalid date range: Start {start_date}, End {selected_end_date}")
+        if start_day > end_day:
+            logger.warning(f"User {user_id} entered invalid date range: Start {start_day}, End {selected_end_date}")
             await query.message.reply_text(
                 "⚠️ Invalid Date Range!\n\nThe START DATE cannot be later than the END DATE. "
                 "Please select the correct dates again."
@@ -399,32 +410,30 @@ async def end_date_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 
         # **Check for overlapping leave periods**
+        month_number = MONTH_NUMBERS[month.lower()]
         for existing_start, existing_end, existing_leave_type in user_leaves[user_id][month]:
-            existing_start_date = datetime.strptime(existing_start, "%d-%B")
-            existing_end_date = datetime.strptime(existing_end, "%d-%B")
-
             # Check if the new leave overlaps with any existing leave
-            if not (end_date_obj < existing_start_date or start_date_obj > existing_end_date):
-                logger.warning(f"User {user_id} attempted overlapping leave: {start_date} - {selected_end_date}")
+            if not (end_day < existing_start or start_day > existing_end):
+                logger.warning(f"User {user_id} attempted overlapping leave: {start_day} - {selected_end_date}")
                 await query.message.reply_text(
                     f"⚠️ The selected leave period *overlaps* with an existing leave:\n"
-                    f"📅 *{existing_start}* - *{existing_end}* (*{existing_leave_type}*)\n\n"
+                    f"📅 *{format_leave_date(month_number, existing_start)}* - "
+                    f"*{format_leave_date(month_number, existing_end)}* (*{existing_leave_type}*)\n\n"
                     "🔄 *Please reselect the START and END dates.*",
                     parse_mode="Markdown"
                 )
                 await show_start_date_selection(update, context)  # Prompt for new dates
                 return  # Stop execution
 
-        # **If no overlap, add leave entry**
-
-        user_leaves[user_id][month].append(
-            (start_date_obj.strftime("%d-%B"), end_date_obj.strftime("%d-%B"), leave_type))
-        logger.info(f"Stored leave for {user_id}: {start_date} to {selected_end_date} ({leave_type})")
+        # **If no overlap, add leave entry** (days of month, formatted only when the timesheet is generated)
+        user_leaves[user_id][month].append((start_day, end_day, leave_type))
+        logger.info(f"Stored leave for {user_id}: {start_day} to {selected_end_date} ({leave_type})")
 
         buttons = [
             [InlineKeyboardButton("📝 Yes, Add More Leaves", callback_data="apply_leave")],
             [InlineKeyboardButton("🔧 Add NS Leave / Weekends Efforts / Half Day Efforts", callback_data="special_efforts")],
-            [InlineKeyboardButton("📊 No, Generate Timesheet", callback_data="generate_timesheet_after_leave")]
+            [InlineKeyboardButton("📊 No, Generate Timesheet", callback_data="generate_timesheet_after_leave")],
+            EXPORT_BUTTONS
         ]
         reply_markup = InlineKeyboardMarkup(buttons)
 
@@ -538,8 +547,9 @@ async def generate_timesheet(update: Update, context: ContextTypes.DEFAULT_TYPE)
     # Ensure a queue exists for the user
     user_task_queues.setdefault(user_id, asyncio.Queue())
 
-    # Add timesheet generation task to the queue
-    await user_task_queues[user_id].put((query, context))
+    # Add timesheet generation task to the queue ("export_csv" / "export_json" ask for a numbers-only file)
+    export_format = query.data.replace("export_", "") if query.data.startswith("export_") else None
+    await user_task_queues[user_id].put((query, context, export_format))
 
     # Start processing the queue if it's the first task
     if user_task_queues[user_id].qsize() == 1:
@@ -548,7 +558,7 @@ async def generate_timesheet(update: Update, context: ContextTypes.DEFAULT_TYPE)
 
 async def process_queue(user_id):
     while not user_task_queues[user_id].empty():
-        query, context = await user_task_queues[user_id].get()
+        query, context, export_format = await user_task_queues[user_id].get()
 
         try:
             month = context.user_data.get("month")
@@ -558,7 +568,7 @@ async def process_queue(user_id):
 
             logger.info(f"Generating timesheet for user {user_id} for month: {month}")
 
-            month_number = datetime.strptime(month, "%B").month
+            month_number = MONTH_NUMBERS[month.lower()]
             year = datetime.now().year
 
             # Ensure leave data exists
@@ -568,52 +578,46 @@ async def process_queue(user_id):
             logger.info(f"Raw leave_data for user {user_id}: {leave_data} (Type: {type(leave_data)})")
             parsed_leave_data = []
 
-            # 🚨 Debugging: Check if leave_data contains unexpected types
             for idx, leave_entry in enumerate(leave_data):
-                logger.debug(f"Checking leave entry at index {idx}: {leave_entry} (Type: {type(leave_entry)})")
-
-                # Ensure each leave entry is a tuple of length 3
+                # Ensure each leave entry is a (start_day, end_day, leave_type) tuple
                 if not isinstance(leave_entry, tuple) or len(leave_entry) != 3:
                     logger.error(
                         f"❌ Invalid leave entry format at index {idx}: {leave_entry} (Type: {type(leave_entry)})")
                     raise ValueError(f"Invalid leave entry format at index {idx}: {leave_entry}")
 
-                start_date_str, end_date_str, leave_type = leave_entry
+                start_day, end_day, leave_type = leave_entry
 
-                # 🚨 Log and Check Each Element Type
-                logger.debug(f"start_date_str: {start_date_str} (Type: {type(start_date_str)})")
-                logger.debug(f"end_date_str: {end_date_str} (Type: {type(end_date_str)})")
-                logger.debug(f"leave_type: {leave_type} (Type: {type(leave_type)})")
-
-                # 🚨 If any value is a float, log an error
-                if isinstance(start_date_str, float):
-                    logger.error(f"❌ start_date_str is a float! Converting to string: {start_date_str}")
-                if isinstance(end_date_str, float):
-                    logger.error(f"❌ end_date_str is a float! Converting to string: {end_date_str}")
-                if isinstance(leave_type, float):
-                    logger.error(f"❌ leave_type is a float! Converting to string: {leave_type}")
-
-                # Ensure all elements are strings before stripping
-                start_date_str = str(start_date_str).strip()
-                end_date_str = str(end_date_str).strip()
-                leave_type = str(leave_type).strip()
-
-                start_date_obj = datetime.strptime(start_date_str, "%d-%B").replace(year=year)
-                end_date_obj = datetime.strptime(end_date_str, "%d-%B").replace(year=year)
-
-                parsed_leave_data.append((start_date_obj.strftime("%d-%B"), end_date_obj.strftime("%d-%B"), leave_type))
+                # Days of month are formatted into the generator's "DD-Month" dates only here
+                parsed_leave_data.append((format_leave_date(month_number, start_day),
+                                          format_leave_date(month_number, end_day), str(leave_type).strip()))
 
             logger.info(f"Final parsed_leave_data for user {user_id}: {parsed_leave_data}")
 
             await asyncio.sleep(AWAIT)  # Delay to prevent race conditions
 
-            output_file = generate_timesheet_excel(user_id, month_number, year, parsed_leave_data)
-
-            if not os.path.exists(output_file):
-                raise FileNotFoundError(f"Timesheet file not found: {output_file}")
-
-            with open(output_file, "rb") as doc:
-                await query.message.reply_document(document=doc, filename=os.path.basename(output_file))
+            # Generated in memory and uploaded straight from the buffer, nothing is written to disk
+            with record(enabled=PHASE_TIMING) as timings:
+                if export_format:
+                    filename, doc, totals = generate_timesheet_export(user_id, month_number, year, parsed_leave_data,
+                                                                      export_format, with_totals=True)
+                else:
+                    filename, doc, totals = generate_timesheet_excel(user_id, month_number, year, parsed_leave_data,
+                                                                     in_memory=True, with_totals=True)
+            if timings is not None:
+                phase_stats.add(timings)
+                logger.info(f"Timesheet phases for user {user_id}: {format_timings(timings)}")
+                logger.info(f"Average phases over {phase_stats.count} timesheets: "
+                            f"{format_timings(phase_stats.averages())}")
+
+            with doc:
+                await query.message.reply_document(document=doc, filename=filename)
+
+            # Year-to-date balances (/balance) are kept up to date with every generated month; the user already
+            # has the timesheet, so a failing ledger update is only logged
+            try:
+                leave_ledger.record_month(user_id, year, month_number, parsed_leave_data, totals)
+            except Exception as e:
+                logger.error(f"Leave ledger update failed for user {user_id} ({month} {year}): {e}")
 
             # Clear leave data only after a successful generation
             user_leaves[user_id][month] = []
@@ -638,6 +642,31 @@ async def process_queue(user_id):
         if not user_task_queues[user_id].empty():
             user_task_queues[user_id].task_done()
 
+# /balance: leave booked so far this year, from the ledger of generated timesheets
+async def balance(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    user_id = str(update.effective_user.id)
+    year = datetime.now().year
+    ytd, months = leave_ledger.balance(user_id, year)
+
+    if not months:
+        await update.message.reply_text(
+            f"📊 No timesheets generated for {year} yet.\n\nType /start to generate one.")
+        return
+
+    lines = [f"📊 <b>{year} so far</b> ({months} month(s) generated):", ""]
+    lines += [f"• {column}: <b>{value:g}</b>" for column, value in ytd.items()]
+    await update.message.reply_text("\n".join(lines), parse_mode="HTML")
+
+
+# /rebuild_balance: recompute the user's ledger from the stored leaves, in case it drifted
+async def rebuild_balance(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    user_id = str(update.effective_user.id)
+    months = leave_ledger.rebuild([user_id])
+    logger.info(f"User {user_id} rebuilt their leave balance ({months} month(s)).")
+    await update.message.reply_text(f"♻️ Recomputed {months} month(s) of leave.")
+    await balance(update, context)
+
+
 async def restart_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
@@ -692,6 +721,8 @@ def main():
 
     application.add_handler(CommandHandler("start", start))
     application.add_handler(CommandHandler("register", register_new_user))
+    application.add_handler(CommandHandler("balance", balance))
+    application.add_handler(CommandHandler("rebuild_balance", rebuild_balance))
 
     # # Add MessageHandler to capture user input during registration
     # Register a **single** message handler that decides the flow
@@ -714,7 +745,8 @@ def main():
     application.add_handler(CallbackQueryHandler(start_date_handler, pattern="^start_date_"))
     application.add_handler(CallbackQueryHandler(end_date_handler, pattern="^end_date_"))
     application.add_handler(
-        CallbackQueryHandler(generate_timesheet, pattern="^(generate_timesheet_now|generate_timesheet_after_leave)$"))
+        CallbackQueryHandler(generate_timesheet,
+                             pattern="^(generate_timesheet_now|generate_timesheet_after_leave|export_csv|export_json)$"))
 
     # Restart Button Handler
     application.add_handler(CallbackQueryHandler(restart_handler, pattern="^restart_timesheet$"))
@@ -724,6 +756,9 @@ def main():
     application.add_handler(CommandHandler("deregister", confirm_deregistration))
     application.add_handler(CallbackQueryHandler(handle_deregistration_buttons, pattern="^deregister_"))
 
+    # Pick up edits of config/ph.json without a restart (and without losing the sessions in user_leaves)
+    start_holiday_polling()
+
     application.run_polling()
 
 
@@ -0,0 +1,158 @@
+"""
+Generate timesheets from the command line, without Telegram.
+
+    python cli.py --month May --year 2025
+    python cli.py --month 1-3 --users 123,456 --leaves leaves.csv --workers 4 --zip q1.zip
+    python cli.py --month 1-12 --format csv --zip payroll.zip
+
+Leave files list (user_id, start_date, end_date, leave_type) with dates as "DD-Month" (e.g. "12-May"):
+  CSV:  a header row "user_id,start_date,end_date,leave_type" followed by one leave per row
+  JSON: {"<user_id>": [["12-May", "14-May", "NS Leave"], ...]}
+"""
+import argparse
+from contextlib import nullcontext
+import csv
+import json
+import logging
+import os
+import sys
+import time
+import zipfile
+from datetime import datetime
+from itertools import chain
+from leave_calendar import leaves_in_month, parse_leave_date
+from timesheet_batch import BatchResult, generate_timesheets
+from timesheet_export import EXPORT_FORMATS, generate_timesheet_export
+from timesheet_generator import generate_timesheet_excel
+from utils.utils import load_user_details
+
+logger = logging.getLogger(__name__)
+
+
+def parse_month(value):
+    """Month number from "5", "05", "May" or "may"."""
+    if value.isdigit() and 1 <= int(value) <= 12:
+        return int(value)
+    try:
+        return datetime.strptime(value.capitalize(), "%B").month
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid month: {value}")
+
+
+def parse_months(value):
+    """A single month ("May") or an inclusive range ("1-3", "January-March")."""
+    first, _, last = value.partition("-")
+    first = parse_month(first)
+    last = parse_month(last) if last else first
+    if last < first:
+        raise argparse.ArgumentTypeError(f"Invalid month range: {value}")
+    return list(range(first, last + 1))
+
+
+def load_leaves(path):
+    """Read a CSV or JSON leave file into {user_id: [(start_date, end_date, leave_type), ...]}."""
+    leaves = {}
+    with open(path, newline="") as file:
+        if path.lower().endswith(".json"):
+            for user_id, entries in json.load(file).items():
+                leaves[str(user_id)] = [tuple(str(value).strip() for value in entry) for entry in entries]
+        else:
+            for row in csv.DictReader(file):
+                leaves.setdefault(row["user_id"].strip(), []).append(
+                    (row["start_date"].strip(), row["end_date"].strip(), row["leave_type"].strip()))
+    return leaves
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate timesheets without the Telegram bot.")
+    parser.add_argument("--month", type=parse_months, required=True, help='Month or range, e.g. "May", "5" or "1-3"')
+    parser.add_argument("--year", type=int, default=datetime.now().year)
+    parser.add_argument("--users", help="Comma separated user IDs (default: every registered user)")
+    parser.add_argument("--leaves", help="Leave file (.csv or .json)")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes (0 = one per CPU, default 1)")
+    parser.add_argument("--format", choices=("xlsx",) + EXPORT_FORMATS, default="xlsx",
+                        help="xlsx timesheets, or numbers-only CSV / JSON exports (always generated in-process)")
+    output = parser.add_mutually_exclusive_group()
+    output.add_argument("--output-dir", default="generated_timesheets")
+    output.add_argument("--zip", help="Write every timesheet into this zip file instead")
+    args = parser.parse_args(argv)
+
+    registered = load_user_details()
+    user_ids = [user_id.strip() for user_id in args.users.split(",")] if args.users else list(registered)
+    unknown = [user_id for user_id in user_ids if user_id not in registered]
+    if unknown:
+        parser.error(f"Unknown user IDs: {', '.join(unknown)}")
+    leaves = load_leaves(args.leaves) if args.leaves else {}
+
+    generated, failed, generation_time = 0, 0, 0.0
+    start = time.perf_counter()
+    if not args.zip:
+        os.makedirs(args.output_dir, exist_ok=True)
+    with zipfile.ZipFile(args.zip, "w", zipfile.ZIP_DEFLATED) if args.zip else nullcontext() as archive:
+        for month in args.month:
+            leaves_by_user, invalid = {}, []
+            for user_id in user_ids:
+                try:
+                    leaves_by_user[user_id] = _leaves_for_month(leaves.get(user_id, []), month, args.year)
+                except ValueError as e:
+                    invalid.append(BatchResult(user_id, None, str(e), None))
+            if args.workers == 1 or args.format != "xlsx":
+                results = _generate_sequentially(month, args.year, leaves_by_user, args.format)
+            else:
+                results = generate_timesheets(month, args.year, leaves_by_user, max_workers=args.workers,
+                                              in_memory=True)
+
+            for result in chain(invalid, results):
+                if result.error:
+                    failed += 1
+                    print(f"FAILED  {result.user_id} {args.year}-{month:02d}: {result.error}")
+                    continue
+                filename, buffer = result.output
+                if archive is not None:
+                    archive.writestr(filename, buffer.getvalue())
+                    target = f"{args.zip}:{filename}"
+                else:
+                    target = os.path.join(args.output_dir, filename)
+                    with open(target, "wb") as file:
+                        file.write(buffer.getvalue())
+                generated += 1
+                generation_time += result.seconds
+                print(f"{result.seconds * 1000:8.1f} ms  {target}")
+
+    elapsed = time.perf_counter() - start
+    print(f"Generated {generated} timesheet(s), {failed} failed, in {elapsed:.2f}s "
+          f"({generation_time:.2f}s spent generating)")
+    return 1 if failed else 0
+
+
+def _leaves_for_month(leave_details, month, year):
+    """
+    The user's leaves that touch `month`. Unlike the generator, which skips bad entries, a leave file
+    typo fails the user (ValueError) so it gets reported instead of silently missing from the timesheet.
+    """
+    for leave_entry in leave_details:
+        if len(leave_entry) != 3:
+            raise ValueError(f"Expected start_date, end_date, leave_type: {leave_entry}")
+        parse_leave_date(leave_entry[0], year)
+        parse_leave_date(leave_entry[1], year)
+    return leaves_in_month(leave_details, month, year)
+
+
+def _generate_sequentially(month, year, leaves_by_user, output_format="xlsx"):
+    """Same results as timesheet_batch.generate_timesheets, in this process."""
+    for user_id, leave_details in leaves_by_user.items():
+        start = time.perf_counter()
+        try:
+            if output_format == "xlsx":
+                output = generate_timesheet_excel(user_id, month, year, leave_details, in_memory=True)
+            else:
+                output = generate_timesheet_export(user_id, month, year, leave_details, output_format)
+        except Exception as e:
+            logger.error(f"Timesheet generation failed for user {user_id}: {e}")
+            yield BatchResult(user_id, None, str(e), None)
+        else:
+            yield BatchResult(user_id, output, None, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,30 @@
+import json
+import pytest
+from utils import utils
+
+PROFILE = {
+    "name": "Test User",
+    "timesheet_preference": "1.0",
+    "skill_level": "Professional",
+    "role_specialization": "DevOps Engineer - II",
+    "group_specialization": "Platform",
+    "contractor": "Test Pte Ltd",
+    "po_ref": "GVT000ABC1234",
+    "po_date": "1 May 24 - 30",
+    "description": "Agile Co-Development Services",
+    "reporting_officer": "John Doe",
+}
+
+
+@pytest.fixture
+def profile():
+    return dict(PROFILE)
+
+
+@pytest.fixture
+def registered_user(tmp_path, monkeypatch, profile):
+    """User "1" with `profile`, in a JSON user store of its own; returns the profile."""
+    user_file = tmp_path / "user_details.json"
+    user_file.write_text(json.dumps({"1": profile}))
+    monkeypatch.setattr(utils, "user_store", utils.JSONUserStore(str(user_file)))
+    return profile
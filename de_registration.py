@@ -1,7 +1,8 @@
 import logging
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
-from utils.utils import load_user_details, save_user_data
+from utils.utils import delete_user, load_user_details
+from leave_ledger import leave_ledger
 
 # Function to escape MarkdownV2 special characters e.g. "/"
 def escape_markdown_v2(text):
@@ -47,8 +48,8 @@ async def handle_deregistration_buttons(update: Update, context: ContextTypes.DE
         user_details = load_user_details()
 
         if user_id in user_details:
-            del user_details[user_id]  # Remove user data
-            save_user_data(user_details)  # Save updated data
+            delete_user(user_id)  # Remove user data
+            leave_ledger.remove_user(user_id)  # And the leave balances
 
             logging.info(f"User {user_id} data removed.")
             await query.message.reply_text(
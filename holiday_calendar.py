@@ -0,0 +1,183 @@
+"""
+Public holiday calendars, each compiled from a JSON file into a (year, month) -> {day: name} index.
+
+The default calendar (DEFAULT_CALENDAR, Singapore) is config/ph.json; any other calendar NAME is read
+from CALENDAR_DIR/NAME.json. A user follows the calendar named in the `holiday_calendar` field of their
+profile (the default one when the field is missing). Calendars are loaded the first time they are asked
+for, so only the ones some user refers to are kept in memory.
+
+Loaded files are re-read by a background poller (start_polling()) when their mtime or size changes. A
+new index is compiled next to the current one and swapped in with a single assignment, so handlers that
+call get_holiday_index() never wait for a reload. A file that fails validation is rejected and the
+current calendar stays in use.
+
+Check a file before deploying it with:
+
+    python -m holiday_calendar config/ph.json
+"""
+import configparser
+from datetime import date
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from utils.utils import PUBLIC_HOLIDAYS, PUBLIC_HOLIDAYS_FILE, file_stamp
+
+logger = logging.getLogger(__name__)
+
+config = configparser.ConfigParser()
+config.read("config/config.ini")
+POLL_SECONDS = config.getfloat("holidays", "POLL_SECONDS", fallback=60)
+DEFAULT_CALENDAR = config.get("holidays", "DEFAULT_CALENDAR", fallback="SG")
+CALENDAR_DIR = config.get("holidays", "CALENDAR_DIR", fallback="config/holidays")
+CALENDAR_NAME = re.compile(r"^[A-Za-z0-9_-]+$")
+
+NO_HOLIDAYS = {}
+
+
+class HolidayIndex:
+    """Public holidays keyed by (year, month) -> {day: name}."""
+    __slots__ = ("by_month",)
+
+    def __init__(self, holidays):
+        self.by_month = {}
+        for date_str, name in holidays.items():
+            holiday = date.fromisoformat(date_str)
+            self.by_month.setdefault((holiday.year, holiday.month), {})[holiday.day] = name
+
+    def month(self, year, month):
+        """{day: holiday name} for one month (shared, do not modify)."""
+        return self.by_month.get((year, month), NO_HOLIDAYS)
+
+
+def validate_holidays(holidays):
+    """Raise ValueError describing every problem unless `holidays` is {"YYYY-MM-DD": name}."""
+    if not isinstance(holidays, dict):
+        raise ValueError(f"expected an object of dates, got {type(holidays).__name__}")
+    problems = []
+    for date_str, name in holidays.items():
+        try:
+            date.fromisoformat(date_str)
+        except ValueError:
+            problems.append(f"invalid date {date_str!r}")
+        if not isinstance(name, str) or not name.strip():
+            problems.append(f"{date_str}: holiday name must be a non-empty string")
+    if problems:
+        raise ValueError("; ".join(problems))
+    return holidays
+
+
+def load_holidays(file_path):
+    """Read and validate a holiday file; raises OSError or ValueError (json errors included)."""
+    with open(file_path, "r") as file:
+        return validate_holidays(json.load(file))
+
+
+class HolidayCalendar:
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.index = HolidayIndex({})
+        self.stamp = None
+        self.reload_lock = threading.Lock()  # Serialises reloads only; readers never take it
+        self.reload()
+
+    def reload(self):
+        """Swap in a new index if the file changed and is valid; returns True when it was swapped."""
+        with self.reload_lock:
+            stamp = file_stamp(self.file_path)
+            if stamp == self.stamp:
+                return False
+            self.stamp = stamp  # A rejected file is not retried until it changes again
+            try:
+                holidays = load_holidays(self.file_path)
+            except (OSError, ValueError) as e:
+                logger.error(f"Keeping the current holiday calendar, {self.file_path} was rejected: {e}")
+                return False
+            self.index = HolidayIndex(holidays)
+            if self.file_path == PUBLIC_HOLIDAYS_FILE:
+                PUBLIC_HOLIDAYS.clear()  # Update in place so `from utils.utils import PUBLIC_HOLIDAYS` sees the change
+                PUBLIC_HOLIDAYS.update(holidays)
+            logger.info(f"Holiday calendar loaded from {self.file_path}: {len(holidays)} holiday(s)")
+            return True
+
+
+_calendars = {}  # Calendar name -> HolidayCalendar, filled on first use
+_unknown = set()  # Names without a file, served by the default calendar until their file appears
+_calendars_lock = threading.Lock()
+
+
+def calendar_file(name):
+    """The file of a calendar name, None when the name is not valid or has no file."""
+    if name == DEFAULT_CALENDAR:
+        return PUBLIC_HOLIDAYS_FILE
+    if not isinstance(name, str) or not CALENDAR_NAME.match(name):
+        return None
+    file_path = os.path.join(CALENDAR_DIR, f"{name}.json")
+    return file_path if os.path.exists(file_path) else None
+
+
+def get_calendar(name=None):
+    """The named calendar (loaded on first use); unknown names fall back to the default calendar."""
+    name = name or DEFAULT_CALENDAR
+    if not isinstance(name, str):  # e.g. a number or list in the profile; may not even be hashable
+        logger.warning(f"Invalid holiday calendar {name!r}, using {DEFAULT_CALENDAR}")
+        return get_calendar(DEFAULT_CALENDAR)
+    calendar = _calendars.get(name)
+    if calendar is None:
+        file_path = calendar_file(name)
+        if file_path is None:
+            logger.warning(f"Unknown holiday calendar {name!r}, using {DEFAULT_CALENDAR}")
+            calendar = get_calendar(DEFAULT_CALENDAR)
+        with _calendars_lock:
+            if name not in _calendars:
+                if file_path is None:
+                    _unknown.add(name)
+                else:
+                    calendar = HolidayCalendar(file_path)
+                _calendars[name] = calendar
+            calendar = _calendars[name]
+    return calendar
+
+
+def get_holiday_index(calendar=None):
+    """The current index of a calendar (never blocks once loaded; reloads happen on the poller thread)."""
+    return get_calendar(calendar).index
+
+
+_poller = None
+
+
+def start_polling(interval=POLL_SECONDS):
+    """Check the loaded calendars' files for changes every `interval` seconds on a daemon thread (once per process)."""
+    global _poller
+    if _poller is not None:
+        return
+
+    def poll():
+        while True:
+            time.sleep(interval)
+            for name in list(_unknown):
+                if calendar_file(name) is not None:  # Its file was added: load it on the next lookup
+                    with _calendars_lock:
+                        _unknown.discard(name)
+                        _calendars.pop(name, None)
+            for calendar in set(_calendars.values()):
+                try:
+                    calendar.reload()
+                except Exception:
+                    logger.exception(f"Reloading the holiday calendar {calendar.file_path} failed")
+
+    _poller = threading.Thread(target=poll, name="holiday-calendar", daemon=True)
+    _poller.start()
+
+
+if __name__ == "__main__":
+    try:
+        holidays = load_holidays(sys.argv[1] if len(sys.argv) > 1 else PUBLIC_HOLIDAYS_FILE)
+    except (OSError, ValueError) as e:
+        print(f"Invalid: {e}")
+        sys.exit(1)
+    print(f"OK: {len(holidays)} holiday(s) in {len(HolidayIndex(holidays).by_month)} month(s)")
@@ -0,0 +1,183 @@
+from datetime import date
+from calendar import isleap, monthrange
+from functools import lru_cache
+import logging
+from phase_timing import phase
+
+logger = logging.getLogger(__name__)
+
+WEEKEND_DAYS = (5, 6)  # Saturday, Sunday
+ABSENCE_COLUMNS = {  # Leave types that fill their own column and clear "At Work"
+    "Sick Leave": "sick_leave",
+    "Childcare Leave": "childcare_leave",
+    "Annual Leave": "annual_leave",
+    "NS Leave": "ns_leave",
+}
+
+# Leave dates are "DD-Month" strings (e.g. "06-June"), parsed once into (month, day) integers
+MONTH_NAMES = (None, "January", "February", "March", "April", "May", "June", "July", "August", "September",
+               "October", "November", "December")
+MONTH_NUMBERS = {name.lower(): number for number, name in enumerate(MONTH_NAMES) if name}
+DAYS_IN_MONTH = (None, 31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)  # February as in a leap year
+
+
+@lru_cache(maxsize=4096)  # A year holds only 366 distinct dates, so bulk callers mostly hit the cache
+def parse_leave_date(value, year=None):
+    """
+    (month, day) of a "DD-Month" leave date, without strptime; the tuples compare in date order.
+    29 February is only valid in leap years when `year` is given. Raises ValueError for anything else.
+    """
+    day, _, month_name = str(value).strip().partition("-")
+    month = MONTH_NUMBERS.get(month_name.lower())
+    if month is None or not day.isdigit() or len(day) > 2:
+        raise ValueError(f"Invalid leave date: {value}")
+    day = int(day)
+    last_day = 28 if month == 2 and year is not None and not isleap(year) else DAYS_IN_MONTH[month]
+    if not 1 <= day <= last_day:
+        raise ValueError(f"Invalid leave date: {value}")
+    return month, day
+
+
+def format_leave_date(month, day):
+    """The "DD-Month" string for a (month, day) leave date."""
+    return f"{day:02d}-{MONTH_NAMES[month]}"
+
+
+class DayEntry:
+    """Resolved values for a single day of the timesheet."""
+
+    __slots__ = ("day", "weekday", "is_holiday", "at_work", "public_holiday", "sick_leave",
+                 "childcare_leave", "annual_leave", "ns_leave", "remark")
+
+    def __init__(self, day, weekday, is_holiday, at_work, remark):
+        self.day = day
+        self.weekday = weekday
+        self.is_holiday = is_holiday
+        self.at_work = at_work
+        self.public_holiday = 1.0 if is_holiday else 0.0
+        self.sick_leave = 0.0
+        self.childcare_leave = 0.0
+        self.annual_leave = 0.0
+        self.ns_leave = 0.0
+        self.remark = remark
+
+
+def parse_leave_entry(leave_entry, year=None):
+    """
+    (start, end, leave_type) of a (start_date, end_date, leave_type) or (date, leave_type) entry, with the
+    dates as (month, day). Returns None (and logs why) for an entry that has to be skipped.
+    """
+    try:
+        if isinstance(leave_entry, tuple) and len(leave_entry) == 3:
+            start_date, end_date, leave_type = leave_entry
+            return parse_leave_date(start_date, year), parse_leave_date(end_date, year), leave_type
+        if isinstance(leave_entry, tuple) and len(leave_entry) == 2:
+            # Direct (date, leave_type) entry
+            date_str, leave_type = leave_entry
+            start = parse_leave_date(date_str, year)
+            return start, start, leave_type
+    except ValueError:
+        logger.error(f"Invalid date format in leave entry: {leave_entry}")
+        return None
+    logger.error(f"Unexpected leave format: {leave_entry}")
+    return None
+
+
+def expand_leave_days(year, month, leave_details):
+    """Group leave entries by day of month, keeping the order they were entered in."""
+    leave_by_day = {}
+    _, days_in_month = monthrange(year, month)
+
+    for leave_entry in leave_details:
+        parsed = parse_leave_entry(leave_entry, year)
+        if parsed is None:
+            continue  # Skip invalid entries
+        start, end, leave_type = parsed
+        logger.info(f"Expanding leave range: {leave_entry}")
+
+        # Only the days that fall inside the requested month matter
+        first = max(start, (month, 1))
+        last = min(end, (month, days_in_month))
+        if first <= last:
+            for day in range(first[1], last[1] + 1):
+                leave_by_day.setdefault(day, []).append(leave_type)
+
+    logger.info(f"Final expanded leave days: {leave_by_day}")
+    return leave_by_day
+
+
+def leaves_in_month(leave_details, month, year=None):
+    """
+    Only the leave entries that touch the given month (leaves elsewhere would add an empty NS Leave column).
+    Invalid entries are logged and skipped, as expand_leave_days does.
+    """
+    selected = []
+    for leave_entry in leave_details:
+        parsed = parse_leave_entry(leave_entry, year)
+        if parsed is not None and parsed[0][0] <= month <= parsed[1][0]:
+            selected.append(leave_entry)
+    return selected
+
+
+def build_leave_calendar(year, month, leave_details, timesheet_preference, holidays):
+    """
+    Resolve every day of the month exactly once. `holidays` maps day of month -> public holiday name.
+    Returns a list indexed by day of month (index 0 is unused) holding a DayEntry per day.
+    """
+    _, days_in_month = monthrange(year, month)
+    with phase("leave_expansion"):
+        leave_by_day = expand_leave_days(year, month, leave_details)
+    effort_hours = 8.0 if timesheet_preference == 8.5 else 1.0
+
+    with phase("day_rules"):
+        days = [None]
+        weekday = date(year, month, 1).weekday()
+        for day in range(1, days_in_month + 1):
+            holiday_name = holidays.get(day)
+            is_holiday = holiday_name is not None
+            is_weekend = weekday in WEEKEND_DAYS
+
+            # **Set Default Work Hours (Before Any Leaves)**
+            if is_weekend:
+                at_work = 0.0
+                remark = "Saturday" if weekday == 5 else "Sunday"
+            elif timesheet_preference == 8.5:
+                at_work = 8.5 if weekday != 4 else 8.0  # Mon-Thu: 8.5, Fri: 8.0
+                remark = "-"
+            else:
+                at_work = timesheet_preference
+                remark = "-"
+
+            if is_holiday:
+                at_work = 0.0
+                remark = holiday_name
+
+            entry = DayEntry(day, weekday, is_holiday, at_work, remark)
+
+            # Leaves are applied in the order they were entered, so later entries win
+            for leave_type in leave_by_day.get(day, ()):
+                if leave_type in ABSENCE_COLUMNS:
+                    # Leave should NOT apply on weekends or public holidays
+                    if not is_weekend and not is_holiday:
+                        setattr(entry, ABSENCE_COLUMNS[leave_type], 1.0)
+                        entry.at_work = 0.0
+                elif leave_type == "Weekend Efforts":
+                    # Only update at_work if it's a Saturday, Sunday, or Public Holiday
+                    if is_weekend or is_holiday:
+                        entry.at_work = effort_hours
+                elif leave_type == "Public Holiday Efforts":
+                    # Only update at_work if it's a Public Holiday
+                    if is_holiday:
+                        entry.at_work = effort_hours
+                elif leave_type == "Half Day":
+                    # - If timesheet preference is 8.5: Mon-Thu = 4.5 hours, Friday = 4.0 hours
+                    # - If timesheet preference is 1.0: 0.5 on every day
+                    if timesheet_preference == 8.5:
+                        entry.at_work = 4.5 if weekday != 4 else 4.0
+                    else:
+                        entry.at_work = 0.5
+
+            days.append(entry)
+            weekday = (weekday + 1) % 7
+
+    return days
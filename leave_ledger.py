@@ -0,0 +1,144 @@
+"""
+Year-to-date leave ledger: the totals of every generated timesheet per (user, year, month), plus a
+running total per (user, year) so a balance is a single row lookup instead of regenerating the months.
+
+Stored in SQLite (config/leave_ledger.db), so recording a month writes that user's rows only:
+    ledger_months (user_id, year, month, leaves, totals)  -- leaves and totals as JSON
+    ledger_ytd    (user_id, year, totals)
+An existing config/leave_ledger.json from earlier versions is imported the first time the database is opened.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+from timesheet_model import compute_timesheet
+from utils.utils import load_json, load_user_details
+
+logger = logging.getLogger(__name__)
+
+LEDGER_DB_FILE = "config/leave_ledger.db"
+LEDGER_FILE = "config/leave_ledger.json"  # Earlier whole-file format, imported once
+
+
+class LeaveLedger:
+    def __init__(self, db_path=LEDGER_DB_FILE, json_path=None):
+        self.db_path = db_path
+        self.json_path = json_path
+        self.lock = threading.RLock()  # The connection is shared by every thread
+        self.connection = None
+        self.pid = None
+
+    def connect(self):
+        """The connection for this process, opened (and the tables created) on first use."""
+        if self.pid != os.getpid():
+            self.connection = sqlite3.connect(self.db_path, check_same_thread=False)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+            self.connection.executescript("""
+                CREATE TABLE IF NOT EXISTS ledger_months (
+                    user_id TEXT NOT NULL, year INTEGER NOT NULL, month INTEGER NOT NULL, leaves TEXT NOT NULL,
+                    totals TEXT NOT NULL, PRIMARY KEY (user_id, year, month));
+                CREATE TABLE IF NOT EXISTS ledger_ytd (
+                    user_id TEXT NOT NULL, year INTEGER NOT NULL, totals TEXT NOT NULL, PRIMARY KEY (user_id, year));
+                CREATE TABLE IF NOT EXISTS ledger_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+            """)
+            self.pid = os.getpid()
+            if self.json_path:
+                self.import_json(self.json_path)
+        return self.connection
+
+    def import_json(self, json_path):
+        """One-shot import of a config/leave_ledger.json file; later calls are ignored."""
+        connection = self.connection
+        if connection.execute("SELECT 1 FROM ledger_meta WHERE key = 'imported_from'").fetchone():
+            return
+        entries = load_json(json_path)
+        with connection:
+            for user_id, years in entries.items():
+                for year, year_entry in years.items():
+                    connection.executemany(
+                        "INSERT OR REPLACE INTO ledger_months VALUES (?, ?, ?, ?, ?)",
+                        [(user_id, int(year), int(month), json.dumps(month_entry["leaves"]),
+                          json.dumps(month_entry["totals"])) for month, month_entry in year_entry["months"].items()])
+                    connection.execute("INSERT OR REPLACE INTO ledger_ytd VALUES (?, ?, ?)",
+                                       (user_id, int(year), json.dumps(year_entry["ytd"])))
+            connection.execute("INSERT INTO ledger_meta VALUES ('imported_from', ?)", (json_path,))
+        if entries:
+            logger.info(f"Imported the leave ledger of {len(entries)} user(s) from {json_path} to {self.db_path}")
+
+    def record_month(self, user_id, year, month, leave_details, totals):
+        """Store a generated month's leaves and totals, replacing any earlier version of that month."""
+        with self.lock, self.connect() as connection:
+            row = connection.execute("SELECT totals FROM ledger_ytd WHERE user_id = ? AND year = ?",
+                                     (user_id, year)).fetchone()
+            ytd = json.loads(row[0]) if row else {}
+            previous = connection.execute(
+                "SELECT totals FROM ledger_months WHERE user_id = ? AND year = ? AND month = ?",
+                (user_id, year, month)).fetchone()
+            if previous:  # Regenerated month: take its old totals back out first
+                for column, value in json.loads(previous[0]).items():
+                    ytd[column] = ytd.get(column, 0.0) - value
+            for column, value in totals.items():
+                ytd[column] = ytd.get(column, 0.0) + value
+
+            connection.execute("INSERT OR REPLACE INTO ledger_months VALUES (?, ?, ?, ?, ?)",
+                               (user_id, year, month, json.dumps([list(leave_entry) for leave_entry in leave_details]),
+                                json.dumps(dict(totals))))
+            connection.execute("INSERT OR REPLACE INTO ledger_ytd VALUES (?, ?, ?)", (user_id, year, json.dumps(ytd)))
+
+    def balance(self, user_id, year):
+        """(year-to-date totals, number of months recorded) for a user; ({}, 0) when nothing was generated."""
+        with self.lock:
+            connection = self.connect()
+            months = connection.execute("SELECT COUNT(*) FROM ledger_months WHERE user_id = ? AND year = ?",
+                                        (user_id, year)).fetchone()[0]
+            if not months:
+                return {}, 0
+            row = connection.execute("SELECT totals FROM ledger_ytd WHERE user_id = ? AND year = ?",
+                                     (user_id, year)).fetchone()
+            return json.loads(row[0]) if row else {}, months
+
+    def rebuild(self, user_ids=None):
+        """
+        Recompute every stored month's totals from its stored leaves (with the user's current profile
+        and holidays) and the running totals from those. Users that are no longer registered keep their
+        stored totals. Returns the number of months recomputed.
+        """
+        registered = load_user_details()
+        recomputed = 0
+        with self.lock, self.connect() as connection:
+            if user_ids is None:
+                user_ids = [user_id for user_id, in connection.execute("SELECT DISTINCT user_id FROM ledger_months")]
+            for user_id in user_ids:
+                profile = registered.get(user_id)
+                ytd_by_year = {}
+                for year, month, leaves, totals in connection.execute(
+                        "SELECT year, month, leaves, totals FROM ledger_months WHERE user_id = ? ORDER BY year, month",
+                        (user_id,)).fetchall():
+                    if profile:
+                        leaves = [tuple(leave_entry) for leave_entry in json.loads(leaves)]
+                        totals = compute_timesheet(profile, year, month, leaves).totals
+                        connection.execute(
+                            "UPDATE ledger_months SET totals = ? WHERE user_id = ? AND year = ? AND month = ?",
+                            (json.dumps(totals), user_id, year, month))
+                        recomputed += 1
+                    else:
+                        logger.warning(f"User {user_id} is not registered, keeping the stored {year}-{month} totals")
+                        totals = json.loads(totals)
+                    ytd = ytd_by_year.setdefault(year, {})
+                    for column, value in totals.items():
+                        ytd[column] = ytd.get(column, 0.0) + value
+                connection.executemany("INSERT OR REPLACE INTO ledger_ytd VALUES (?, ?, ?)",
+                                       [(user_id, year, json.dumps(ytd)) for year, ytd in ytd_by_year.items()])
+        logger.info(f"Leave ledger rebuilt: {recomputed} month(s) recomputed")
+        return recomputed
+
+    def remove_user(self, user_id):
+        with self.lock, self.connect() as connection:
+            connection.execute("DELETE FROM ledger_months WHERE user_id = ?", (user_id,))
+            connection.execute("DELETE FROM ledger_ytd WHERE user_id = ?", (user_id,))
+
+
+# Shared by the bot and de-registration
+leave_ledger = LeaveLedger(json_path=LEDGER_FILE)
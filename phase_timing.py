@@ -0,0 +1,75 @@
+"""
+Optional per-phase timing of timesheet generation.
+
+The generator marks its phases with `with phase("save"): ...`. Nothing is measured unless the caller
+records them:
+
+    with record() as timings:
+        generate_timesheet_excel(...)
+    logger.info(format_timings(timings))  # e.g. "template 0.1 ms, day_loop 2.3 ms, save 20.5 ms"
+
+Without an active record() a phase is a shared no-op context manager, so the markers cost next to nothing.
+"""
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+import time
+
+_timings = ContextVar("phase_timings", default=None)  # Phase name -> seconds of the active record()
+_DISABLED = nullcontext()
+
+
+class _Phase:
+    __slots__ = ("timings", "name", "start")
+
+    def __init__(self, timings, name):
+        self.timings = timings
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        self.timings[self.name] = self.timings.get(self.name, 0.0) + time.perf_counter() - self.start
+
+
+def phase(name):
+    """Time the enclosed block as `name` (added up when a phase runs more than once, e.g. per month)."""
+    timings = _timings.get()
+    if timings is None:
+        return _DISABLED
+    return _Phase(timings, name)
+
+
+@contextmanager
+def record(enabled=True):
+    """Collect {phase name: seconds} for everything run inside the block; yields None when not enabled."""
+    if not enabled:
+        yield None
+        return
+    timings = {}
+    token = _timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _timings.reset(token)
+
+
+def format_timings(timings):
+    return ", ".join(f"{name} {seconds * 1000:.1f} ms" for name, seconds in timings.items())
+
+
+class PhaseStats:
+    """Phase timings added up over many requests."""
+
+    def __init__(self):
+        self.count = 0
+        self.totals = {}
+
+    def add(self, timings):
+        self.count += 1
+        for name, seconds in timings.items():
+            self.totals[name] = self.totals.get(name, 0.0) + seconds
+
+    def averages(self):
+        """Average seconds per request for each phase."""
+        return {name: total / self.count for name, total in self.totals.items()}
@@ -1,7 +1,7 @@
 import logging
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
-from utils.utils import load_user_details, save_user_data
+from utils.utils import load_user_details, set_user_field
 from security import sanitize_input
 import re
 # def escape_markdown_v2(text):
@@ -44,9 +44,6 @@ async def capture_user_details(update: Update, context: ContextTypes.DEFAULT_TYP
         await update.message.reply_text("❌ Registration error. Type /start to retry.\nUse /reset or /deregister to start over.")
         return
 
-    user_details = load_user_details()
-    user_details.setdefault(user_id, {})
-
     # Apply sanitization
     if step != "po_date":
         sanitized_message = sanitize_input(
@@ -58,9 +55,8 @@ async def capture_user_details(update: Update, context: ContextTypes.DEFAULT_TYP
     else:
         sanitized_message = user_message  # Store as raw input
 
-    # Save user input
-    user_details[user_id][step] = sanitized_message
-    save_user_data(user_details)
+    # Save user input (only this field is written)
+    set_user_field(user_id, step, sanitized_message)
 
     # Field mapping for step transitions
     field_mapping = {
@@ -121,10 +117,11 @@ async def capture_user_details(update: Update, context: ContextTypes.DEFAULT_TYP
         )
 
     elif step == "reporting_officer":
-        logging.info(f"User {user_id} completed registration: {user_details[user_id]}")
+        logging.info(f"User {user_id} completed registration: {load_user_details()[user_id]}")
         await update.message.reply_text(
             "✅ <b>Registration complete!</b> \n\n"
-            "Type /start to begin using the bot.\n\n"
+            "Type /start to begin using the bot.\n"
+            "Use /balance to see the leave you have booked this year.\n\n"
             "If you wish to remove your data and reregister, use /reset or /deregister.",
             parse_mode="HTML"
         )
@@ -157,9 +154,6 @@ async def handle_registration_buttons(update: Update, context: ContextTypes.DEFA
 
     category, value = callback_data.rsplit("_", 1)
 
-    user_details = load_user_details()
-    user_details.setdefault(user_id, {})
-
     field_step_mapping = {
         "timesheet_preference": "skill_level",
         "skill_level": "role_specialization",
@@ -169,9 +163,8 @@ async def handle_registration_buttons(update: Update, context: ContextTypes.DEFA
     }
 
     if category in field_step_mapping:
-        user_details[user_id][category] = value
+        set_user_field(user_id, category, value)
         context.user_data["registration_step"] = field_step_mapping[category]
-        save_user_data(user_details)
 
         if category == "timesheet_preference":
             await query.message.reply_text(f"Your full day preference is <b>{value}</b>", parse_mode="HTML")
@@ -0,0 +1,104 @@
+from openpyxl.utils import get_column_letter
+
+
+class SheetLayout:
+    """
+    Tracks column content lengths and font assignments while a worksheet is written,
+    so widths and fonts can be emitted in one step without re-scanning the sheet.
+    Values can also be recorded with put() and rendered later by either renderer.
+    """
+
+    def __init__(self, default_font):
+        self.default_font = default_font
+        self.values = {}  # (row, column) -> value recorded with put()
+        self.fonts = {}  # (row, column) -> Font
+        self.fills = {}  # (row, column) -> PatternFill
+        self.font_exempt_rows = set()  # Rows that only get explicitly assigned fonts
+        self.font_exempt_columns = set()  # Columns that only get explicitly assigned fonts
+        self.max_lengths = {}  # column -> longest str(value) written to it
+        self.max_row = 0
+        self.max_column = 0
+
+    def copy(self):
+        """A new layout that starts from this one's column lengths and extent (fonts are not carried over)."""
+        layout = SheetLayout(self.default_font)
+        layout.max_lengths = dict(self.max_lengths)
+        layout.max_row = self.max_row
+        layout.max_column = self.max_column
+        return layout
+
+    def _extend(self, row, column):
+        if row > self.max_row:
+            self.max_row = row
+        if column > self.max_column:
+            self.max_column = column
+
+    def track(self, column, value):
+        """Record a value written to a column for width calculation."""
+        length = len(str(value or ""))
+        if length > self.max_lengths.get(column, 0):
+            self.max_lengths[column] = length
+
+    def write(self, ws, row, column, value):
+        """Write a value through the layout so its column length is tracked."""
+        cell = ws.cell(row=row, column=column, value=value)
+        self.track(column, value)
+        self._extend(row, column)
+        return cell
+
+    def assign(self, ws, coordinate, value):
+        """Same as write(), addressed by coordinate (e.g. "B2")."""
+        cell = ws[coordinate]
+        cell.value = value
+        self.track(cell.column, value)
+        self._extend(cell.row, cell.column)
+        return cell
+
+    def put(self, row, column, value):
+        """Record a value to be rendered later; its column length is tracked."""
+        self.values[(row, column)] = value
+        self.track(column, value)
+        self._extend(row, column)
+
+    def set_fill(self, row, column, fill):
+        """Assign a fill for a single cell."""
+        self.fills[(row, column)] = fill
+        self._extend(row, column)
+
+    def set_font(self, row, column, font):
+        """Assign a font that overrides the default (or exemption) for a single cell."""
+        self.fonts[(row, column)] = font
+        self._extend(row, column)
+
+    def apply_fonts(self, ws):
+        """Emit every font in a single pass over the written area."""
+        default_font = self.default_font
+        fonts = self.fonts
+        for row in ws.iter_rows(min_row=1, max_row=self.max_row, min_col=1, max_col=self.max_column):
+            for cell in row:
+                font = fonts.get((cell.row, cell.column))
+                if font is None:
+                    if cell.row in self.font_exempt_rows or cell.column in self.font_exempt_columns:
+                        continue
+                    font = default_font
+                cell.font = font
+
+    def column_widths(self, fixed=None, minimum=None, maximum=None):
+        """
+        Column widths from the tracked lengths (longest value + 2), keyed by column letter.
+        `fixed` widths win; columns listed in `minimum` are floored, all others are capped at `maximum`.
+        """
+        fixed = fixed or {}
+        minimum = minimum or {}
+        widths = {}
+        for column in range(1, self.max_column + 1):
+            letter = get_column_letter(column)
+            width = self.max_lengths.get(column, 0) + 2
+            if letter in fixed:
+                width = fixed[letter]
+            elif letter in minimum:
+                width = max(width, minimum[letter])
+            elif maximum is not None:
+                width = min(width, maximum)
+            widths[letter] = width
+        return widths
@@ -1,23 +1,76 @@
-from openpyxl.styles import Alignment, PatternFill, Font, Border, Side
+from openpyxl.styles import Alignment, PatternFill, Font, Border, Side, NamedStyle
+
+# **Style registry**
+# Every style is built once and shared. openpyxl looks each assigned style up by value,
+# and a shared instance is found by identity instead of a field-by-field compare.
+_REGISTRY = {}
+
+
+def shared(style):
+    """The registered instance equal to `style` (registering it on first use)."""
+    return _REGISTRY.setdefault(style, style)
+
+
+def font(**attributes):
+    """Shared Font(**attributes)."""
+    return shared(Font(**attributes))
+
+
+def alignment(**attributes):
+    """Shared Alignment(**attributes)."""
+    return shared(Alignment(**attributes))
+
+
+def solid_fill(color):
+    """Shared solid PatternFill in `color`."""
+    return shared(PatternFill(start_color=color, end_color=color, fill_type="solid"))
+
 
 # Borders
-thin_border = Border(left=Side(style="thin"), right=Side(style="thin"),
-                     top=Side(style="thin"), bottom=Side(style="thin"))
+thin_border = shared(Border(left=Side(style="thin"), right=Side(style="thin"),
+                            top=Side(style="thin"), bottom=Side(style="thin")))
 
 # Fills
-yellow_fill = PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid")  # Yellow
-light_green_fill = PatternFill(start_color="C6EFCE", end_color="C6EFCE", fill_type="solid")  # Light Green (At Work)
-lighter_green_fill = PatternFill(start_color="E2EFDA", end_color="E2EFDA", fill_type="solid")  # Lighter Green (Sick Leave)
-light_yellow_fill = PatternFill(start_color="FFF2CC", end_color="FFF2CC", fill_type="solid")  # Light Yellow (Public Holiday)
-light_blue_fill = PatternFill(start_color="D9E1F2", end_color="D9E1F2", fill_type="solid")  # Light Blue (Annual Leave)
-light_red_fill = PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid")  # Light Red for remarks
-white_fill = PatternFill(start_color="FFFFFF", end_color="FFFFFF", fill_type="solid")  # White (Default)
+yellow_fill = solid_fill("FFFF00")  # Yellow
+light_green_fill = solid_fill("C6EFCE")  # Light Green (At Work)
+lighter_green_fill = solid_fill("E2EFDA")  # Lighter Green (Sick Leave)
+light_yellow_fill = solid_fill("FFF2CC")  # Light Yellow (Public Holiday)
+light_blue_fill = solid_fill("D9E1F2")  # Light Blue (Annual Leave)
+light_red_fill = solid_fill("FFC7CE")  # Light Red for remarks
+white_fill = solid_fill("FFFFFF")  # White (Default)
+no_fill = shared(PatternFill(fill_type=None))  # Explicitly no fill
 
 # Fonts
-bold_font = Font(bold=True)  # Bold font
-red_font = Font(color="FF0000")  # Red font for important remarks
-black_font = Font(color="000000")  # Default black font
+bold_font = font(bold=True)  # Bold font
+red_font = font(color="FF0000")  # Red font for important remarks
+black_font = font(color="000000")  # Default black font
+arial_font = font(name="Arial", size=12)  # Sheet-wide default
+arial_black_font = font(name="Arial", size=12, bold=False, color="000000")  # Remarks, Total values
+arial_red_font = font(name="Arial", size=12, bold=False, color="FF0000")  # Holiday & weekend remarks
+arial_bold_font = font(name="Arial", size=12, bold=True, color="000000")  # Total label
 
 # Alignments
-center_alignment = Alignment(horizontal="center", vertical="center")  # Center alignment
-right_alignment = Alignment(horizontal="right", vertical="center")  # Right alignment
+center_alignment = alignment(horizontal="center", vertical="center")  # Center alignment
+right_alignment = alignment(horizontal="right", vertical="center")  # Right alignment
+bottom_left_alignment = alignment(horizontal="left", vertical="bottom")  # Labels and detail values
+bottom_center_alignment = alignment(horizontal="center", vertical="bottom")  # Header values
+bottom_center_wrap_alignment = alignment(horizontal="center", vertical="bottom", wrap_text=True)  # Description
+
+# Named styles (Summary sheet), added per workbook with add_named_styles()
+SUMMARY_HEADER_STYLE = "Timesheet Summary Header"
+SUMMARY_LABEL_STYLE = "Timesheet Summary Label"
+SUMMARY_VALUE_STYLE = "Timesheet Summary Value"
+SUMMARY_TOTAL_STYLE = "Timesheet Summary Total"
+
+
+def add_named_styles(wb):
+    """Register the timesheet NamedStyles with a workbook (a NamedStyle can only belong to one workbook)."""
+    for name, style_font, fill, style_alignment, number_format in [
+        (SUMMARY_HEADER_STYLE, arial_bold_font, yellow_fill, center_alignment, "General"),
+        (SUMMARY_LABEL_STYLE, arial_font, no_fill, bottom_left_alignment, "General"),
+        (SUMMARY_VALUE_STYLE, arial_font, no_fill, right_alignment, "0.0"),
+        (SUMMARY_TOTAL_STYLE, arial_bold_font, light_yellow_fill, right_alignment, "0.0"),
+    ]:
+        if name not in wb.named_styles:
+            wb.add_named_style(NamedStyle(name=name, font=style_font, fill=fill, border=thin_border,
+                                          alignment=style_alignment, number_format=number_format))
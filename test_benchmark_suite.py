@@ -0,0 +1,20 @@
+from benchmarks.suite import compare
+
+BASELINE = {"empty_month": {"seconds": 0.0262, "peak_bytes": 600000, "output_bytes": 7491},
+            "batch_100_users": {"seconds": 4.2, "peak_bytes": 3000000, "output_bytes": 761321}}
+
+
+def test_small_timings_get_an_absolute_slack():
+    results = {"empty_month": {"seconds": 0.0329, "peak_bytes": 600000, "output_bytes": 7491}}
+    assert compare(results, BASELINE, 0.25, time_slack=0.01) == []
+    results["empty_month"]["seconds"] = 0.0370
+    assert len(compare(results, BASELINE, 0.25, time_slack=0.01)) == 1
+
+
+def test_large_timings_and_sizes_keep_the_relative_threshold():
+    results = {"batch_100_users": {"seconds": 5.3, "peak_bytes": 3000000, "output_bytes": 761321}}
+    assert len(compare(results, BASELINE, 0.25, time_slack=0.01)) == 1
+
+    results = {"empty_month": {"seconds": 0.0262, "peak_bytes": 750001, "output_bytes": 9364}}
+    assert [message.split()[1] for message in compare(results, BASELINE, 0.25, time_slack=1.0)] == [
+        "peak_bytes", "output_bytes"]
@@ -0,0 +1,139 @@
+import json
+import os
+import pytest
+import holiday_calendar
+from holiday_calendar import HolidayCalendar
+from timesheet_bulk import COLUMNS, compute_totals
+from timesheet_model import compute_timesheet
+from utils import utils
+
+HOLIDAYS = {"2025-01-01": "New Year's Day", "2025-05-01": "Labour Day"}
+
+
+def write_holidays(path, content):
+    """Write a holiday file and give it a new mtime, so the change is seen even within one clock tick."""
+    path.write_text(content if isinstance(content, str) else json.dumps(content))
+    stamp = os.stat(path).st_mtime_ns + 1_000_000_000
+    os.utime(path, ns=(stamp, stamp))
+
+
+@pytest.fixture
+def holiday_file(tmp_path):
+    path = tmp_path / "ph.json"
+    write_holidays(path, HOLIDAYS)
+    return path
+
+
+def test_a_valid_edit_swaps_the_index(holiday_file):
+    calendar = HolidayCalendar(str(holiday_file))
+    assert calendar.index.month(2025, 5) == {1: "Labour Day"}
+    assert calendar.reload() is False  # Unchanged file
+
+    write_holidays(holiday_file, dict(HOLIDAYS, **{"2025-05-12": "Vesak Day"}))
+    assert calendar.reload() is True
+    assert calendar.index.month(2025, 5) == {1: "Labour Day", 12: "Vesak Day"}
+
+
+@pytest.mark.parametrize("content", [
+    '{"2025-05-12": "Vesak Day",',  # Malformed JSON
+    {"2025-13-01": "Not A Month"},
+    {"2025-05-12": "  "},
+    ["2025-05-12"],
+])
+def test_a_rejected_file_keeps_the_old_index(holiday_file, content):
+    calendar = HolidayCalendar(str(holiday_file))
+    index = calendar.index
+
+    write_holidays(holiday_file, content)
+    assert calendar.reload() is False
+    assert calendar.index is index
+
+
+def test_a_rejected_file_is_not_retried_until_it_changes(holiday_file, monkeypatch):
+    calendar = HolidayCalendar(str(holiday_file))
+    write_holidays(holiday_file, {"2025-05-12": ""})
+    assert calendar.reload() is False
+
+    loads = []
+    monkeypatch.setattr(holiday_calendar, "load_holidays",
+                        lambda file_path: loads.append(file_path) or holiday_calendar.validate_holidays(HOLIDAYS))
+    assert calendar.reload() is False
+    assert loads == []
+
+    write_holidays(holiday_file, HOLIDAYS)
+    assert calendar.reload() is True
+    assert loads == [str(holiday_file)]
+
+
+def test_validate_holidays_reports_every_problem():
+    with pytest.raises(ValueError) as error:
+        holiday_calendar.validate_holidays({"2025-02-30": "Not A Day", "2025-05-12": 5})
+    assert str(error.value) == "invalid date '2025-02-30'; 2025-05-12: holiday name must be a non-empty string"
+
+
+@pytest.fixture
+def public_holidays():
+    """utils.PUBLIC_HOLIDAYS, restored after the test."""
+    saved = dict(utils.PUBLIC_HOLIDAYS)
+    yield utils.PUBLIC_HOLIDAYS
+    utils.PUBLIC_HOLIDAYS.clear()
+    utils.PUBLIC_HOLIDAYS.update(saved)
+
+
+def test_the_default_file_updates_public_holidays_in_place(holiday_file, monkeypatch, public_holidays):
+    monkeypatch.setattr(holiday_calendar, "PUBLIC_HOLIDAYS_FILE", str(holiday_file))
+    calendar = HolidayCalendar(str(holiday_file))
+    assert public_holidays == HOLIDAYS
+
+    write_holidays(holiday_file, {"2025-05-12": "Vesak Day"})
+    assert calendar.reload() is True
+    assert public_holidays == {"2025-05-12": "Vesak Day"}
+    assert utils.PUBLIC_HOLIDAYS is public_holidays
+
+
+def test_other_files_leave_public_holidays_alone(holiday_file, public_holidays):
+    before = dict(public_holidays)
+    HolidayCalendar(str(holiday_file))
+    assert public_holidays == before
+
+
+# **Named calendars**
+@pytest.fixture
+def calendar_dir(tmp_path, monkeypatch):
+    """An empty CALENDAR_DIR with nothing loaded yet, plus MY.json."""
+    directory = tmp_path / "holidays"
+    directory.mkdir()
+    write_holidays(directory / "MY.json", {"2025-03-10": "Test Holiday", "2025-03-31": "Hari Raya Puasa"})
+    monkeypatch.setattr(holiday_calendar, "CALENDAR_DIR", str(directory))
+    monkeypatch.setattr(holiday_calendar, "_calendars", {})
+    monkeypatch.setattr(holiday_calendar, "_unknown", set())
+    return directory
+
+
+def test_a_calendar_in_calendar_dir_is_used(calendar_dir):
+    assert holiday_calendar.get_holiday_index("MY").month(2025, 3) == {10: "Test Holiday", 31: "Hari Raya Puasa"}
+    assert holiday_calendar.get_calendar("MY").file_path == str(calendar_dir / "MY.json")
+
+
+@pytest.mark.parametrize("name", ["XX", "../ph", 5, ["MY"]])
+def test_unknown_and_invalid_names_fall_back_to_the_default(calendar_dir, name):
+    assert holiday_calendar.get_calendar(name) is holiday_calendar.get_calendar()
+    assert holiday_calendar.get_calendar().file_path == utils.PUBLIC_HOLIDAYS_FILE
+
+
+def test_unused_calendars_are_not_loaded(calendar_dir):
+    write_holidays(calendar_dir / "ID.json", {"2025-03-29": "Nyepi"})
+    holiday_calendar.get_holiday_index("MY")
+    assert set(holiday_calendar._calendars) == {"MY"}
+
+
+def test_compute_totals_for_users_on_different_calendars(calendar_dir, profile):
+    profiles = [dict(profile, holiday_calendar=name) for name in ("MY", None, "XX", 5)] + [profile]
+    leaves = [[("10-March", "12-March", "Annual Leave")]] * len(profiles)
+    totals, _ = compute_totals(profiles, 2025, 3, leaves)
+
+    for row, user_profile in enumerate(profiles):
+        expected = compute_timesheet(user_profile, 2025, 3, leaves[row]).totals
+        assert dict(zip(COLUMNS, totals[row])) == {column: expected.get(column, 0.0) for column in COLUMNS}
+    assert totals[0][COLUMNS.index("Public Holiday")] == 2.0  # MY: 10 and 31 March
+    assert totals[1][COLUMNS.index("Public Holiday")] == 1.0  # SG: 31 March
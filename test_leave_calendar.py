@@ -0,0 +1,36 @@
+from openpyxl import load_workbook
+from leave_calendar import leaves_in_month
+from timesheet_model import compute_timesheet
+import timesheet_generator
+
+# Valid entries mixed with the kinds expand_leave_days logs and skips
+LEAVES = [
+    ("03-March", "05-March", "Annual Leave"),
+    ("31-Febuary", "31-Febuary", "Annual Leave"),  # Typo in the month
+    ("29-February", "29-February", "Sick Leave"),  # Not a leap year
+    ("10-April", "NS Leave"),  # Single-day (date, leave_type) entry
+    ("12-April",),
+]
+
+
+def test_leaves_in_month_skips_invalid_entries():
+    assert leaves_in_month(LEAVES, 3, 2025) == [LEAVES[0]]
+    assert leaves_in_month(LEAVES, 4, 2025) == [LEAVES[3]]
+    assert leaves_in_month(LEAVES, 2, 2025) == []
+
+
+def test_yearly_and_monthly_generation_accept_the_same_leaves(registered_user):
+    months = (2, 3, 4)
+    for month in months:
+        timesheet_generator.generate_timesheet_excel("1", month, 2025, LEAVES, in_memory=True)
+    _, buffer = timesheet_generator.generate_yearly_timesheet_excel("1", 2025, LEAVES, months=range(2, 5),
+                                                                    in_memory=True)
+
+    workbook = load_workbook(buffer)
+    assert workbook.sheetnames == ["2025 Summary", "February 2025 Timesheet", "March 2025 Timesheet",
+                                   "April 2025 Timesheet"]
+    header, *rows, _ = workbook["2025 Summary"].iter_rows(values_only=True)
+    assert [row[0] for row in rows] == ["February", "March", "April"]
+    for month, row in zip(months, rows):
+        totals = compute_timesheet(registered_user, 2025, month, leaves_in_month(LEAVES, month, 2025)).totals
+        assert dict(zip(header[1:], row[1:])) == {column: totals.get(column, 0.0) for column in header[1:]}
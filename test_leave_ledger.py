@@ -0,0 +1,56 @@
+import json
+import pytest
+from leave_ledger import LeaveLedger
+from timesheet_model import compute_timesheet
+
+MARCH_LEAVES = [("03-March", "05-March", "Annual Leave")]
+APRIL_LEAVES = [("07-April", "07-April", "Sick Leave")]
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    return LeaveLedger(str(tmp_path / "leave_ledger.db"))
+
+
+def test_balance_of_an_empty_ledger(ledger):
+    assert ledger.balance("1", 2025) == ({}, 0)
+
+
+def test_regenerated_month_replaces_its_totals(ledger):
+    ledger.record_month("1", 2025, 3, MARCH_LEAVES, {"At Work": 18.0, "Annual Leave": 3.0})
+    ledger.record_month("1", 2025, 4, APRIL_LEAVES, {"At Work": 21.0, "Sick Leave": 1.0})
+    ledger.record_month("1", 2025, 3, [], {"At Work": 21.0, "Annual Leave": 0.0})
+
+    assert ledger.balance("1", 2025) == ({"At Work": 42.0, "Annual Leave": 0.0, "Sick Leave": 1.0}, 2)
+    assert ledger.balance("1", 2024) == ({}, 0)
+
+
+def test_rebuild_recomputes_registered_users_only(ledger, registered_user):
+    ledger.record_month("1", 2025, 3, MARCH_LEAVES, {"At Work": 99.0})  # Drifted totals
+    ledger.record_month("2", 2025, 3, MARCH_LEAVES, {"At Work": 99.0})  # No longer registered
+
+    assert ledger.rebuild() == 1
+    assert ledger.balance("1", 2025) == (compute_timesheet(registered_user, 2025, 3, MARCH_LEAVES).totals, 1)
+    assert ledger.balance("2", 2025) == ({"At Work": 99.0}, 1)
+
+
+def test_remove_user(ledger):
+    ledger.record_month("1", 2025, 3, MARCH_LEAVES, {"At Work": 18.0})
+    ledger.record_month("2", 2025, 3, MARCH_LEAVES, {"At Work": 18.0})
+    ledger.remove_user("1")
+
+    assert ledger.balance("1", 2025) == ({}, 0)
+    assert ledger.balance("2", 2025) == ({"At Work": 18.0}, 1)
+
+
+def test_json_ledger_is_imported_once(tmp_path):
+    json_path = tmp_path / "leave_ledger.json"
+    json_path.write_text(json.dumps({"1": {"2025": {
+        "months": {"3": {"leaves": [list(MARCH_LEAVES[0])], "totals": {"At Work": 18.0}}},
+        "ytd": {"At Work": 18.0}}}}))
+    db_path = str(tmp_path / "leave_ledger.db")
+    assert LeaveLedger(db_path, json_path=str(json_path)).balance("1", 2025) == ({"At Work": 18.0}, 1)
+
+    ledger = LeaveLedger(db_path, json_path=str(json_path))
+    ledger.remove_user("1")
+    assert LeaveLedger(db_path, json_path=str(json_path)).balance("1", 2025) == ({}, 0)
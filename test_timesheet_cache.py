@@ -0,0 +1,34 @@
+import pytest
+from timesheet_model import compute_timesheet
+import timesheet_generator
+
+
+@pytest.fixture(autouse=True)
+def timesheet_cache(monkeypatch):
+    cache = timesheet_generator.TimesheetCache(1024 * 1024)
+    monkeypatch.setattr(timesheet_generator, "timesheet_cache", cache)
+    return cache
+
+
+def test_leaves_that_render_differently_do_not_share_a_cache_entry(registered_user, timesheet_cache):
+    annual_leave = [("03-March", "05-March", "Annual Leave")]
+    padded_type = [("03-March", "05-March", "Annual Leave ")]  # Not an absence type for the generator
+    assert (compute_timesheet(registered_user, 2025, 3, annual_leave).totals
+            != compute_timesheet(registered_user, 2025, 3, padded_type).totals)
+
+    timesheet_generator.generate_timesheet_excel("1", 3, 2025, annual_leave, in_memory=True)
+    timesheet_generator.generate_timesheet_excel("1", 3, 2025, padded_type, in_memory=True)
+    assert timesheet_cache.stats()["hits"] == 0
+
+    timesheet_generator.generate_timesheet_excel("1", 3, 2025, annual_leave, in_memory=True)
+    assert timesheet_cache.stats()["hits"] == 1
+
+
+def test_totals_come_with_cached_timesheets(registered_user, timesheet_cache):
+    leaves = [("03-March", "05-March", "Annual Leave"), ("10-March", "10-March", "Half Day")]
+    expected = compute_timesheet(registered_user, 2025, 3, leaves).totals
+    for _ in range(2):  # Rendered, then served from the cache
+        _, _, totals = timesheet_generator.generate_timesheet_excel("1", 3, 2025, leaves, in_memory=True,
+                                                                    with_totals=True)
+        assert totals == expected
+    assert timesheet_cache.stats()["hits"] == 1
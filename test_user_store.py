@@ -0,0 +1,205 @@
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import threading
+import pytest
+from utils.utils import JSONUserStore, JournalUserStore, SQLiteUserStore
+
+PROFILE = {
+    "name": "Store Test",
+    "skill_level": "Professional",
+    "role_specialization": "DevOps Engineer - II",
+    "group_specialization": "Platform",
+    "contractor": "Test Pte Ltd",
+}
+
+
+def set_fields_concurrently(store, threads=8, fields=25):
+    """Every thread writes its own fields of the same user at the same time."""
+    def worker(thread):
+        for field in range(fields):
+            store.set_field("1", f"field_{thread}_{field}", field)
+
+    workers = [threading.Thread(target=worker, args=(thread,)) for thread in range(threads)]
+    for worker_thread in workers:
+        worker_thread.start()
+    for worker_thread in workers:
+        worker_thread.join()
+    return {f"field_{thread}_{field}": field for thread in range(threads) for field in range(fields)}
+
+
+# **Journal store**
+@pytest.fixture
+def journal_paths(tmp_path):
+    snapshot = tmp_path / "user_details.json"
+    snapshot.write_text(json.dumps({"1": PROFILE}))
+    return str(snapshot), str(tmp_path / "user_details.journal.jsonl")
+
+
+def test_journal_replays_changes_over_the_snapshot(journal_paths):
+    store = JournalUserStore(*journal_paths)
+    store.set_field("2", "name", "New User")
+    store.delete_user("2")
+    store.set_field("1", "po_ref", "GVT000ABC1234")
+
+    assert JournalUserStore(*journal_paths).load_all() == {"1": dict(PROFILE, po_ref="GVT000ABC1234")}
+    assert json.loads(open(journal_paths[0]).read()) == {"1": PROFILE}  # Only appended, not rewritten
+
+
+def test_journal_skips_a_torn_last_line(journal_paths):
+    store = JournalUserStore(*journal_paths)
+    store.set_field("1", "po_ref", "GVT000ABC1234")
+    store.flush()
+    with open(journal_paths[1], "a") as journal:
+        journal.write('{"ts": "2025-07-01T09:00:00", "op": "set", "user_id": "1", "fi')  # Crash mid-append
+
+    reopened = JournalUserStore(*journal_paths)
+    assert reopened.load_all() == {"1": dict(PROFILE, po_ref="GVT000ABC1234")}
+    reopened.set_field("1", "name", "Renamed")  # Starts on a new line instead of extending the torn one
+    assert JournalUserStore(*journal_paths).load_all()["1"]["name"] == "Renamed"
+
+
+def test_save_all_appends_only_the_differences(journal_paths):
+    store = JournalUserStore(*journal_paths)
+    store.set_field("2", "name", "Second User")
+    users = store.load_all()
+    users["1"]["name"] = "Renamed"
+    del users["1"]["contractor"]
+    del users["2"]
+    store.save_all(users)
+
+    changes = [{key: value for key, value in entry.items() if key != "ts"} for entry in store.history()]
+    assert changes[1:] == [
+        {"op": "set", "user_id": "1", "field": "name", "value": "Renamed"},
+        {"op": "unset", "user_id": "1", "field": "contractor"},
+        {"op": "delete", "user_id": "2"},
+    ]
+    assert JournalUserStore(*journal_paths).load_all() == users
+
+
+def test_compaction_writes_the_snapshot_and_keeps_the_history(journal_paths):
+    snapshot_path, journal_path = journal_paths
+    store = JournalUserStore(snapshot_path, journal_path, compact_bytes=1000)
+    for index in range(20):
+        store.set_field("1", "po_ref", f"PO-{index}")
+
+    assert os.path.getsize(journal_path) < 1000
+    with open(snapshot_path) as snapshot:
+        assert json.load(snapshot)["1"]["po_ref"].startswith("PO-")
+    assert [entry["value"] for entry in store.history("1")] == [f"PO-{index}" for index in range(20)]
+    assert JournalUserStore(snapshot_path, journal_path).load_all()["1"]["po_ref"] == "PO-19"
+
+
+def test_journal_keeps_every_concurrent_set_field(journal_paths):
+    store = JournalUserStore(*journal_paths, compact_bytes=4096)  # Compacts several times on the way
+    expected = set_fields_concurrently(store)
+    assert JournalUserStore(*journal_paths).load_all()["1"] == dict(PROFILE, **expected)
+
+
+# **JSON store**
+@pytest.fixture
+def user_file(tmp_path):
+    path = tmp_path / "user_details.json"
+    path.write_text(json.dumps({"1": PROFILE}))
+    return str(path)
+
+
+def test_json_store_keeps_every_concurrent_set_field(user_file):
+    store = JSONUserStore(user_file, flush_delay=0.01)
+    expected = set_fields_concurrently(store)
+    store.flush()
+    assert JSONUserStore(user_file).load_all()["1"] == dict(PROFILE, **expected)
+
+
+def test_json_store_coalesces_changes_until_the_flush(user_file):
+    store = JSONUserStore(user_file, flush_delay=60)
+    store.set_field("1", "po_ref", "GVT000ABC1234")
+    store.delete_user("1")
+    store.set_field("2", "name", "Second User")
+    assert JSONUserStore(user_file).load_all() == {"1": PROFILE}  # Nothing written yet
+
+    store.flush()
+    assert JSONUserStore(user_file).load_all() == {"2": {"name": "Second User"}}
+
+
+def test_failed_json_write_leaves_the_old_file(user_file):
+    store = JSONUserStore(user_file)
+    with pytest.raises(TypeError):
+        store.set_field("1", "po_ref", object())  # Not JSON serialisable: fails halfway through the dump
+
+    assert JSONUserStore(user_file).load_all() == {"1": PROFILE}
+    assert os.listdir(os.path.dirname(user_file)) == ["user_details.json"]  # No temp file left behind
+
+
+# **SQLite store**
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "user_details.db")
+
+
+def test_importing_utils_does_not_open_the_store(tmp_path):
+    os.makedirs(tmp_path / "config")
+    subprocess.run([sys.executable, "-c", "import utils.utils, holiday_calendar"], cwd=tmp_path, check=True,
+                   env=dict(os.environ, PYTHONPATH=os.path.dirname(os.path.abspath(__file__))))
+    assert os.listdir(tmp_path / "config") == []
+
+
+def stored_rows(db_path):
+    with sqlite3.connect(db_path) as connection:
+        return {(user_id, field): json.loads(value)
+                for user_id, field, value in connection.execute("SELECT user_id, field, value FROM user_fields")}
+
+
+def test_sqlite_migrates_the_json_file_once(db_path, user_file):
+    assert SQLiteUserStore(db_path, json_path=user_file).load_all() == {"1": PROFILE}
+
+    with open(user_file, "w") as file:
+        json.dump({"1": PROFILE, "2": dict(PROFILE, name="Added Later")}, file)
+    assert SQLiteUserStore(db_path, json_path=user_file).load_all() == {"1": PROFILE}
+
+
+def test_sqlite_save_all_writes_only_the_differences(db_path, user_file):
+    store = SQLiteUserStore(db_path, json_path=user_file)
+    store.set_field("2", "name", "Second User")
+    users = store.load_all()
+    users["1"]["name"] = "Renamed"
+    users["1"]["po_ref"] = "GVT000ABC1234"
+    del users["1"]["contractor"]
+    del users["2"]
+
+    statements = []
+    store.connect().set_trace_callback(statements.append)
+    store.save_all(users)
+    writes = [statement for statement in statements if statement.startswith(("INSERT", "DELETE"))]
+    assert len(writes) == 4  # Two upserts, one deleted field, one deleted user
+
+    expected = {("1", field): value for field, value in users["1"].items()}
+    assert stored_rows(db_path) == expected
+    assert SQLiteUserStore(db_path).load_all() == users
+
+
+def test_sqlite_delete_user(db_path, user_file):
+    store = SQLiteUserStore(db_path, json_path=user_file)
+    store.set_field("2", "name", "Second User")
+    store.delete_user("2")
+    store.delete_user("3")  # Unknown users are ignored
+
+    assert store.load_all() == {"1": PROFILE}
+    assert {user_id for user_id, _ in stored_rows(db_path)} == {"1"}
+
+
+def test_sqlite_reloads_when_another_connection_commits(db_path, user_file):
+    store = SQLiteUserStore(db_path, json_path=user_file)
+    cached = store.load_all()
+    assert store.load_all() is cached  # Nothing changed: the cached users are reused
+
+    SQLiteUserStore(db_path).set_field("1", "name", "Changed Elsewhere")
+    assert store.load_all()["1"]["name"] == "Changed Elsewhere"
+
+
+def test_sqlite_keeps_every_concurrent_set_field(db_path, user_file):
+    store = SQLiteUserStore(db_path, json_path=user_file)
+    expected = set_fields_concurrently(store)
+    assert SQLiteUserStore(db_path).load_all()["1"] == dict(PROFILE, **expected)
@@ -0,0 +1,47 @@
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import configparser
+import logging
+import os
+import time
+from timesheet_generator import generate_timesheet_excel
+
+logger = logging.getLogger(__name__)
+
+config = configparser.ConfigParser()
+config.read("config/config.ini")
+BATCH_WORKERS = config.getint("timesheet", "BATCH_WORKERS", fallback=0)  # 0 = one worker per CPU
+
+# One finished timesheet: `output` is what generate_timesheet_excel returned, `error` is set instead on failure
+BatchResult = namedtuple("BatchResult", ["user_id", "output", "error", "seconds"])
+
+
+def _generate_one(user_id, month, year, leave_details, in_memory):
+    """Runs in a worker process; returns the output together with the time spent generating it."""
+    start = time.perf_counter()
+    output = generate_timesheet_excel(user_id, month, year, leave_details, in_memory=in_memory)
+    return output, time.perf_counter() - start
+
+
+def generate_timesheets(month, year, leaves_by_user, max_workers=None, in_memory=False):
+    """
+    Generate timesheets for many users in parallel worker processes.
+    `leaves_by_user` maps user_id -> leave_details (as passed to generate_timesheet_excel).
+    Yields a BatchResult per user as soon as that user's timesheet is done (completion order, not input order);
+    a failing user is reported in its result and does not stop the rest of the batch.
+    """
+    max_workers = max_workers or BATCH_WORKERS or os.cpu_count()
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(_generate_one, user_id, month, year, leave_details, in_memory): user_id
+            for user_id, leave_details in leaves_by_user.items()
+        }
+        for future in as_completed(futures):
+            user_id = futures[future]
+            try:
+                output, seconds = future.result()
+            except Exception as e:
+                logger.error(f"Timesheet generation failed for user {user_id}: {e}")
+                yield BatchResult(user_id, None, str(e), None)
+            else:
+                yield BatchResult(user_id, output, None, seconds)
@@ -0,0 +1,133 @@
+"""
+Vectorised timesheet totals for many users at once (yearly and team reports).
+Builds users x days matrices with NumPy and applies the same rules as compute_timesheet,
+giving exactly the same totals without building a DayEntry per day.
+"""
+from calendar import monthrange
+from datetime import date
+import numpy as np
+from leave_calendar import ABSENCE_COLUMNS, WEEKEND_DAYS, parse_leave_entry
+from timesheet_model import NS_TOTAL_COLUMN, TOTAL_COLUMNS
+from holiday_calendar import get_calendar
+
+COLUMNS = TOTAL_COLUMNS + (NS_TOTAL_COLUMN,)  # Columns of the totals matrix
+AT_WORK, PUBLIC_HOLIDAY = 0, 1
+
+# How each leave type acts on a day: its absence column in COLUMNS, or one of the at_work rules below
+_WEEKEND_EFFORTS, _PUBLIC_HOLIDAY_EFFORTS, _HALF_DAY, _IGNORED = range(len(COLUMNS), len(COLUMNS) + 4)
+_LEAVE_ACTIONS = {
+    "Sick Leave": COLUMNS.index("Sick Leave"),
+    "Childcare Leave": COLUMNS.index("Childcare Leave"),
+    "Annual Leave": COLUMNS.index("Annual Leave"),
+    "NS Leave": COLUMNS.index(NS_TOTAL_COLUMN),
+    "Weekend Efforts": _WEEKEND_EFFORTS,
+    "Public Holiday Efforts": _PUBLIC_HOLIDAY_EFFORTS,
+    "Half Day": _HALF_DAY,
+}
+assert set(ABSENCE_COLUMNS) <= set(_LEAVE_ACTIONS)
+
+
+def _leave_ranges(year, month, days_in_month, leaves):
+    """
+    Flatten every user's leaves into arrays (user, order, action, first day, last day), keeping only the
+    days inside the month. Invalid entries are skipped, like expand_leave_days does.
+    """
+    users, orders, actions, firsts, lasts = [], [], [], [], []
+    for user, leave_details in enumerate(leaves):
+        order = 0
+        for leave_entry in leave_details:
+            parsed = parse_leave_entry(leave_entry, year)
+            if parsed is None:
+                continue
+            start, end, leave_type = parsed
+            first = max(start, (month, 1))
+            last = min(end, (month, days_in_month))
+            if first <= last:
+                users.append(user)
+                orders.append(order)
+                actions.append(_LEAVE_ACTIONS.get(leave_type, _IGNORED))
+                firsts.append(first[1] - 1)
+                lasts.append(last[1] - 1)
+                order += 1
+    return (np.array(users, dtype=np.intp), np.array(orders, dtype=np.intp), np.array(actions, dtype=np.intp),
+            np.array(firsts, dtype=np.intp), np.array(lasts, dtype=np.intp))
+
+
+def _compute_by_calendar(profiles, year, month, leaves, calendars):
+    """compute_totals for users following different holiday calendars: one pass per calendar."""
+    totals = np.zeros((len(profiles), len(COLUMNS)))
+    ns_leave_present = np.zeros(len(profiles), dtype=bool)
+    rows_by_calendar = {}
+    for row, calendar in enumerate(calendars):
+        rows_by_calendar.setdefault(calendar, []).append(row)
+    for calendar, rows in rows_by_calendar.items():
+        totals[rows], ns_leave_present[rows] = compute_totals(
+            [profiles[row] for row in rows], year, month, [leaves[row] for row in rows],
+            calendar.index.month(year, month))
+    return totals, ns_leave_present
+
+
+def compute_totals(profiles, year, month, leaves, holidays=None):
+    """
+    Totals for many users in one month. `profiles` and `leaves` are parallel sequences (a profile dict and
+    its list of (start_date, end_date, leave_type) entries per user); `holidays` as for compute_timesheet.
+
+    Returns (totals, ns_leave_present): a users x COLUMNS float array, and a bool array telling which users
+    took NS Leave (the only ones whose timesheet has the "National Service Leave" column).
+    """
+    if holidays is None:
+        # Grouped by the calendar actually used, so unknown and invalid names share the default's pass
+        calendars = [get_calendar(profile.get("holiday_calendar")) for profile in profiles]
+        if len(set(calendars)) > 1:
+            return _compute_by_calendar(profiles, year, month, leaves, calendars)
+        holidays = (calendars[0] if calendars else get_calendar()).index.month(year, month)
+    _, days_in_month = monthrange(year, month)
+    user_count = len(profiles)
+
+    # **Day masks** (shared by every user)
+    weekdays = (date(year, month, 1).weekday() + np.arange(days_in_month)) % 7
+    weekend = np.isin(weekdays, WEEKEND_DAYS)
+    friday = weekdays == 4
+    holiday = np.zeros(days_in_month, dtype=bool)
+    holiday[[day - 1 for day in holidays if 1 <= day <= days_in_month]] = True
+    workday = ~weekend & ~holiday
+
+    # **Default Work Hours** per user and day
+    preferences = np.array([float(profile.get("timesheet_preference", 1.0)) for profile in profiles])
+    eight_and_half = (preferences == 8.5)[:, None]
+    at_work = np.where(eight_and_half, np.where(friday, 8.0, 8.5), preferences[:, None])
+    at_work[:, weekend | holiday] = 0.0
+    effort_hours = np.where(eight_and_half, 8.0, 1.0)
+    half_day_hours = np.where(eight_and_half, np.where(friday, 4.0, 4.5), 0.5)
+
+    # Days each action applies to; the absences clear "At Work" and never apply on weekends or holidays
+    applies_on = np.zeros((_IGNORED + 1, days_in_month), dtype=bool)
+    applies_on[[_LEAVE_ACTIONS[leave_type] for leave_type in ABSENCE_COLUMNS]] = workday
+    applies_on[_WEEKEND_EFFORTS] = weekend | holiday
+    applies_on[_PUBLIC_HOLIDAY_EFFORTS] = holiday
+    applies_on[_HALF_DAY] = True
+
+    absences = np.zeros((user_count, len(COLUMNS), days_in_month), dtype=bool)
+    users, orders, actions, firsts, lasts = _leave_ranges(year, month, days_in_month, leaves)
+    day_numbers = np.arange(days_in_month)
+
+    # Leaves are applied in the order they were entered, so later entries win: one vectorised step per
+    # position in the users' leave lists (each user has at most one entry per step)
+    for order in range(orders.max() + 1 if orders.size else 0):
+        selected = orders == order
+        rows, action = users[selected], actions[selected]
+        mask = ((day_numbers >= firsts[selected][:, None]) & (day_numbers <= lasts[selected][:, None])
+                & applies_on[action])
+        hours = np.where(action[:, None] == _HALF_DAY, half_day_hours[rows],
+                         np.where((action == _WEEKEND_EFFORTS) | (action == _PUBLIC_HOLIDAY_EFFORTS),
+                                  effort_hours[rows, 0], 0.0)[:, None])
+        at_work[rows] = np.where(mask, hours, at_work[rows])
+        absent = action < len(COLUMNS)
+        absences[rows[absent], action[absent]] |= mask[absent]
+
+    totals = absences.sum(axis=2, dtype=np.float64)
+    totals[:, AT_WORK] = at_work.cumsum(axis=1)[:, -1]  # Summed day by day like the scalar engine
+    totals[:, PUBLIC_HOLIDAY] = holiday.sum()
+    ns_leave_present = np.array([any(entry[-1] == "NS Leave" for entry in leave_details)
+                                 for leave_details in leaves], dtype=bool)
+    return totals, ns_leave_present
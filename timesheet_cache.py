@@ -0,0 +1,56 @@
+from collections import OrderedDict
+import hashlib
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def cache_key(**fields):
+    """Content hash of everything that ends up in a timesheet (fields must be JSON serialisable)."""
+    payload = json.dumps(fields, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class TimesheetCache:
+    """
+    LRU cache of rendered timesheet bytes (with the month's totals), keyed by cache_key().
+    Entries are evicted least recently used first once `max_bytes` is exceeded; 0 disables the cache.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # key -> (bytes, totals), least recently used first
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Return the cached (bytes, totals) for a key (marking them recently used), or None."""
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key, data, totals=None):
+        """Store rendered bytes, evicting the least recently used entries to stay under the size cap."""
+        if len(data) > self.max_bytes:
+            return  # Too large to cache (or caching disabled)
+        if key in self.entries:
+            self.total_bytes -= len(self.entries.pop(key)[0])
+        self.entries[key] = (data, totals)
+        self.total_bytes += len(data)
+        while self.total_bytes > self.max_bytes:
+            _, (evicted, _) = self.entries.popitem(last=False)
+            self.total_bytes -= len(evicted)
+
+    def clear(self):
+        """Drop every entry (the hit/miss counters are kept)."""
+        self.entries.clear()
+        self.total_bytes = 0
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self.entries), "bytes": self.total_bytes}
@@ -0,0 +1,71 @@
+"""CSV / JSON export of the timesheet numbers, for scripts that do not need the xlsx (no openpyxl involved)."""
+import csv
+import json
+from datetime import datetime
+from io import BytesIO, StringIO
+from timesheet_model import NS_TOTAL_COLUMN, TOTAL_COLUMNS, compute_timesheet
+from utils.utils import load_user_details
+
+EXPORT_FORMATS = ("csv", "json")
+DAY_FIELDS = ("date", "at_work", "public_holiday", "sick_leave", "childcare_leave", "annual_leave", "ns_leave", "remark")
+TOTAL_FIELDS = dict(zip(TOTAL_COLUMNS + (NS_TOTAL_COLUMN,), DAY_FIELDS[1:7]))  # Total column -> field name
+
+
+def day_rows(model):
+    """One tuple per day, in DAY_FIELDS order (dates as YYYY-MM-DD)."""
+    prefix = f"{model.year:04d}-{model.month:02d}-"
+    return [
+        (f"{prefix}{entry.day:02d}", entry.at_work, entry.public_holiday, entry.sick_leave,
+         entry.childcare_leave, entry.annual_leave, entry.ns_leave, entry.remark)
+        for entry in model.days[1:]
+    ]
+
+
+def total_values(model):
+    """Totals keyed by field name; ns_leave is always present (0.0 when no NS Leave was taken)."""
+    totals = dict.fromkeys(DAY_FIELDS[1:7], 0.0)
+    for column, value in model.totals.items():
+        totals[TOTAL_FIELDS[column]] = value
+    return totals
+
+
+def export_csv(model):
+    """A header row, one row per day and a final "Total" row."""
+    output = StringIO()
+    writer = csv.writer(output, lineterminator="\n")
+    writer.writerow(DAY_FIELDS)
+    writer.writerows(day_rows(model))
+    writer.writerow(["Total", *total_values(model).values(), ""])
+    return output.getvalue()
+
+
+def export_json(model):
+    return json.dumps({
+        "name": model.profile.get("name"),
+        "year": model.year,
+        "month": model.month,
+        "days": [dict(zip(DAY_FIELDS, row)) for row in day_rows(model)],
+        "totals": total_values(model),
+    })
+
+
+def generate_timesheet_export(user_id, month, year, leave_details, export_format, with_totals=False):
+    """
+    Same inputs as generate_timesheet_excel; returns (filename, BytesIO) holding the CSV or JSON export,
+    or (filename, BytesIO, totals) with `with_totals=True`.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{export_format}', expected one of {EXPORT_FORMATS}.")
+
+    user_details = load_user_details().get(user_id)
+    if not user_details:
+        raise ValueError(f"User with ID {user_id} not found.")
+
+    model = compute_timesheet(user_details, year, month, leave_details)
+    data = export_csv(model) if export_format == "csv" else export_json(model)
+
+    month_name = datetime(year, month, 1).strftime("%B")
+    filename = f"{month_name}_{year}_Timesheet_{user_details['name'].replace(' ', '_')}.{export_format}"
+    if with_totals:
+        return filename, BytesIO(data.encode("utf-8")), model.totals
+    return filename, BytesIO(data.encode("utf-8"))
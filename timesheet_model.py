@@ -0,0 +1,57 @@
+from calendar import monthrange
+from leave_calendar import build_leave_calendar
+from phase_timing import phase
+from holiday_calendar import get_holiday_index
+
+# Total columns in sheet order; "National Service Leave" is only present when NS Leave was taken
+TOTAL_COLUMNS = ("At Work", "Public Holiday", "Sick Leave", "Childcare Leave", "Annual Leave")
+NS_TOTAL_COLUMN = "National Service Leave"
+
+
+class TimesheetModel:
+    """Everything a renderer needs for one user and month, computed without openpyxl."""
+
+    __slots__ = ("profile", "year", "month", "days_in_month", "timesheet_preference", "ns_leave_present",
+                 "days", "totals")
+
+    def __init__(self, profile, year, month, days_in_month, timesheet_preference, ns_leave_present, days, totals):
+        self.profile = profile
+        self.year = year
+        self.month = month
+        self.days_in_month = days_in_month
+        self.timesheet_preference = timesheet_preference
+        self.ns_leave_present = ns_leave_present
+        self.days = days  # DayEntry per day of month, index 0 is unused
+        self.totals = totals  # Total column -> sum over the month, in sheet order
+
+
+def compute_timesheet(profile, year, month, leaves, holidays=None):
+    """
+    Apply the timesheet rules (weekends, public holidays, leaves, efforts, half days) for one month
+    and add up the totals. `leaves` is the list of (start_date, end_date, leave_type) entries,
+    `holidays` the month's {day: holiday name} (default: from the profile's holiday calendar).
+    """
+    if holidays is None:
+        holidays = get_holiday_index(profile.get("holiday_calendar")).month(year, month)
+    _, days_in_month = monthrange(year, month)
+    ns_leave_present = any(leave_entry[-1] == "NS Leave" for leave_entry in leaves)
+    # Fetch timesheet preference (Default to 1.0 if not set)
+    timesheet_preference = float(profile.get("timesheet_preference", 1.0))
+
+    days = build_leave_calendar(year, month, leaves, timesheet_preference, holidays)
+
+    with phase("totals"):
+        at_work = public_holiday = sick_leave = childcare_leave = annual_leave = ns_leave = 0.0
+        for entry in days[1:]:
+            at_work += entry.at_work if isinstance(entry.at_work, float) else 0.0
+            public_holiday += entry.public_holiday
+            sick_leave += entry.sick_leave
+            childcare_leave += entry.childcare_leave
+            annual_leave += entry.annual_leave
+            ns_leave += entry.ns_leave
+
+    totals = dict(zip(TOTAL_COLUMNS, (at_work, public_holiday, sick_leave, childcare_leave, annual_leave)))
+    if ns_leave_present:
+        totals[NS_TOTAL_COLUMN] = ns_leave
+
+    return TimesheetModel(profile, year, month, days_in_month, timesheet_preference, ns_leave_present, days, totals)
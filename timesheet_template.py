@@ -0,0 +1,369 @@
+from copy import copy
+import importlib
+import itertools
+import logging
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, PatternFill, Border
+from openpyxl.styles.fonts import DEFAULT_FONT
+import styles  # Referenced as styles.<name> so a reloaded styles.py is picked up on rebuild
+from sheet_layout import SheetLayout
+
+logger = logging.getLogger(__name__)
+
+FIRST_DATA_ROW = 11
+LAST_REMARKS_ROW = 52  # Remarks styling covers the data rows plus the Total/Signature block below them
+
+# Built skeletons per (ns_leave_present, days_in_month)
+_TEMPLATES = {}
+_SERIALS = itertools.count(1)  # Every build gets a new serial, so output derived from an old skeleton can be told apart
+
+
+def remarks_column_for(ns_leave_present):
+    """Remarks moves from H (8) to I (9) when the National Service Leave column is shown."""
+    return 9 if ns_leave_present else 8
+
+
+def total_row_for(days_in_month):
+    """The Total row sits two blank rows below the last data row."""
+    return FIRST_DATA_ROW + days_in_month + 2
+
+
+def _shared_style(style, default):
+    """The registered instance of a cell style (see styles.shared), or None if it is the default."""
+    if style == default:
+        return None
+    return styles.shared(copy(style))
+
+
+class TemplateCell:
+    """Value and final style of one static cell; None means "leave the default"."""
+
+    __slots__ = ("row", "column", "value", "font", "fill", "border", "alignment", "number_format")
+
+    def __init__(self, cell):
+        self.row = cell.row
+        self.column = cell.column
+        self.value = cell.value
+        self.font = _shared_style(cell.font, DEFAULT_FONT)
+        self.fill = _shared_style(cell.fill, PatternFill())
+        self.border = _shared_style(cell.border, Border())
+        self.alignment = _shared_style(cell.alignment, Alignment())
+        self.number_format = cell.number_format if cell.number_format != "General" else None
+
+
+class SheetTemplate:
+    """The static skeleton of a timesheet: labels, merges, borders, fills, alignments and fonts."""
+
+    def __init__(self, ws, layout):
+        self.merged_ranges = [str(cell_range) for cell_range in ws.merged_cells.ranges]
+        self.row_heights = {row: dim.height for row, dim in ws.row_dimensions.items() if dim.height}
+        self.cells = [
+            TemplateCell(cell)
+            for row in ws.iter_rows(min_row=1, max_row=ws.max_row, max_col=ws.max_column)
+            for cell in row
+            if cell.value is not None or cell.has_style
+        ]
+        self.cells_by_row = {}  # row -> {column: TemplateCell}, for the streaming renderer
+        for spec in self.cells:
+            self.cells_by_row.setdefault(spec.row, {})[spec.column] = spec
+        self.layout = layout  # Column lengths of the static labels
+        self.serial = next(_SERIALS)
+
+    def new_layout(self):
+        """A layout for one request, seeded with the skeleton's column lengths."""
+        return self.layout.copy()
+
+    def stamp(self, ws, style_arrays=None):
+        """
+        Clone the skeleton into an empty worksheet.
+        `style_arrays` caches registered styles per workbook, see _style_cell().
+        """
+        style_arrays = {} if style_arrays is None else style_arrays
+        for cell_range in self.merged_ranges:  # Merge first so merged cells get their own styles
+            ws.merge_cells(cell_range)
+        for row, height in self.row_heights.items():
+            ws.row_dimensions[row].height = height
+
+        for spec in self.cells:
+            _style_cell(ws.cell(row=spec.row, column=spec.column, value=spec.value), style_arrays, spec)
+
+    def render(self, ws, layout, widths, style_arrays=None):
+        """Standard renderer: stamp the skeleton, then write the request's values and styles on top."""
+        self.stamp(ws, style_arrays)
+        for (row, column), value in layout.values.items():
+            ws.cell(row=row, column=column).value = value
+        for (row, column), font in layout.fonts.items():
+            ws.cell(row=row, column=column).font = font
+        for (row, column), fill in layout.fills.items():
+            ws.cell(row=row, column=column).fill = fill
+        for letter, width in widths.items():
+            ws.column_dimensions[letter].width = width
+
+    def stream(self, ws, layout, widths, style_arrays=None):
+        """
+        Write-only renderer: rows are emitted in order with their final styles, so the
+        worksheet never holds more than one row of cells.
+        """
+        style_arrays = {} if style_arrays is None else style_arrays
+        # Column and row dimensions must be in place before the first row is written
+        for letter, width in widths.items():
+            ws.column_dimensions[letter].width = width
+        for row, height in self.row_heights.items():
+            ws.row_dimensions[row].height = height
+        for cell_range in self.merged_ranges:
+            ws.merged_cells.add(cell_range)
+
+        values_by_row = {}
+        for (row, column), value in layout.values.items():
+            values_by_row.setdefault(row, {})[column] = value
+
+        last_row = max(max(self.cells_by_row), max(values_by_row, default=0))
+        for row in range(1, last_row + 1):
+            specs = self.cells_by_row.get(row, {})
+            values = values_by_row.get(row, {})
+            cells = []
+            for column in range(1, max(list(specs) + list(values) + [0]) + 1):
+                spec = specs.get(column)
+                if spec is None and column not in values:
+                    cells.append(None)
+                    continue
+                cell = WriteOnlyCell(ws, value=values.get(column, spec.value if spec else None))
+                _style_cell(cell, style_arrays, spec, layout.fonts.get((row, column)), layout.fills.get((row, column)))
+                cells.append(cell)
+            ws.append(cells)
+
+
+def _style_cell(cell, style_arrays, spec, font=None, fill=None):
+    """
+    Apply the non-default styles of a template cell (if any), then the per-request font and fill.
+    Each combination is registered with the workbook once; later cells reuse its style array
+    from `style_arrays`, which must only be shared between sheets of the same workbook.
+    """
+    key = (id(spec), id(font), id(fill))
+    style_array = style_arrays.get(key)
+    if style_array is not None:
+        cell._style = copy(style_array)
+        return
+
+    if spec is not None:
+        if spec.font is not None:
+            cell.font = spec.font
+        if spec.fill is not None:
+            cell.fill = spec.fill
+        if spec.border is not None:
+            cell.border = spec.border
+        if spec.alignment is not None:
+            cell.alignment = spec.alignment
+        if spec.number_format is not None:
+            cell.number_format = spec.number_format
+    if font is not None:
+        cell.font = font
+    if fill is not None:
+        cell.fill = fill
+    style_arrays[key] = copy(cell._style)
+
+
+def build_skeleton(ws, layout, ns_leave_present, days_in_month):
+    """Write everything that does not depend on the user, the month or the leaves."""
+    thin_border, yellow_fill = styles.thin_border, styles.yellow_fill
+    remarks_column_index = remarks_column_for(ns_leave_present)
+    last_data_row = FIRST_DATA_ROW + days_in_month - 1
+    current_row = total_row_for(days_in_month)
+
+    ws.merge_cells("B2:D2")
+
+    # Set row height for Description row to ensure proper spacing
+    ws.row_dimensions[8].height = 25  # Adjust row height for better text display
+
+    ws.merge_cells("B3:D3")  # Merge PO Ref value
+    ws.merge_cells("B4:D4")  # Merge PO Date value
+    ws.merge_cells("G2:H2")  # Merge Month/Year value
+    ws.merge_cells("G3:H3")  # Merge Contractor value
+
+    layout.assign(ws, "A2", "Description")
+    layout.assign(ws, "A3", "PO Ref")
+    layout.assign(ws, "A4", "PO Date")
+    layout.assign(ws, "F2", "Month/Year")
+    layout.assign(ws, "F3", "Contractor")
+
+    # Apply Borders for Header Sections
+    for row in range(2, 5):  # A-D Borders for Description, PO Ref, PO Date
+        for col in ["A", "B", "C", "D"]:
+            ws[f"{col}{row}"].border = thin_border
+
+    for row in range(2, 4):  # F-H Borders for Month/Year and Contractor (Fully Inside a Box)
+        for col in ["F", "G", "H"]:
+            ws[f"{col}{row}"].border = thin_border
+
+    # Apply Yellow Fill to Values Only (B-D), and to Month/Year (G2:H2) but NOT Contractor (G3:H3)
+    for row in range(2, 5):
+        for col in ["B", "C", "D"]:
+            ws[f"{col}{row}"].fill = yellow_fill  # Apply to Description, PO Ref, PO Date
+    for col in ["G", "H"]:
+        ws[f"{col}2"].fill = yellow_fill
+
+    # **Apply Bottom Alignment for Values (B-D)**
+    for row in range(3, 5):
+        for col in ["B", "C", "D"]:
+            ws[f"{col}{row}"].alignment = styles.bottom_center_alignment
+
+    # **Wrap Text for Description (B2:D2)**
+    for col in ["B", "C", "D"]:
+        ws[f"{col}2"].alignment = styles.bottom_center_wrap_alignment
+
+    # **Keep Column A Left-Aligned**
+    for row in range(2, 5):
+        ws[f"A{row}"].alignment = styles.bottom_left_alignment
+
+    # **Apply Center Alignment for Skill Level, Contractor, and Month/Year Values**
+    for row in [2, 3, 6]:  # Month/Year, Contractor, Skill Level
+        for col in ["G", "H"]:
+            ws[f"{col}{row}"].alignment = styles.bottom_center_alignment
+
+    # Merge and Format User Details
+    ws.merge_cells("B6:D6")  # Merge Name
+    ws.merge_cells("B7:D7")  # Merge Role Specialization
+    ws.merge_cells("B8:D8")  # Merge Group Specialization
+    ws.merge_cells("G6:H6")  # Merge Skill Level
+
+    layout.assign(ws, "A6", "Name")
+    layout.assign(ws, "A7", "Role Specialization")
+    layout.assign(ws, "A8", "Group/Specialization")
+    layout.assign(ws, "F6", "Skill Level")
+
+    # Apply Borders for User Details
+    for row in range(6, 9):  # A-D Borders for Name, Role Specialization, Group
+        for col in ["A", "B", "C", "D"]:
+            ws[f"{col}{row}"].border = thin_border
+
+    for col in ["F", "G", "H"]:  # F-H Borders for Skill Level
+        ws[f"{col}6"].border = thin_border
+
+    # Apply Yellow Fill to Values Only (B-D, G-H)
+    for row in range(6, 9):
+        for col in ["B", "C", "D"]:
+            ws[f"{col}{row}"].fill = yellow_fill  # Name, Role, Group
+
+    for col in ["G", "H"]:
+        ws[f"{col}6"].fill = yellow_fill  # Skill Level
+
+    # **Left Align Name, Role Specialization, Group Specialization Values**
+    for row in range(6, 9):
+        ws[f"B{row}"].alignment = styles.bottom_left_alignment  # Left align
+
+    # **Table Headers**
+    headers = ["SN", "Date", "At Work", "Public Holiday", "Sick Leave", "Childcare Leave", "Annual Leave"]
+    header_fills = [
+        styles.white_fill, styles.white_fill, styles.light_green_fill, styles.light_yellow_fill,
+        styles.lighter_green_fill, styles.white_fill, styles.light_blue_fill
+    ]
+    if ns_leave_present:
+        headers.append("National Service Leave")  # Add NS Leave column only if applicable
+        header_fills.append(styles.light_red_fill)  # Color for NS Leave
+    headers.append("Remarks")  # Add Remarks at the end
+    header_fills.append(styles.white_fill)
+
+    # **Create Table Headers Dynamically**
+    for col_num, (header, fill) in enumerate(zip(headers, header_fills), 1):
+        cell = layout.write(ws, 10, col_num, header)
+        cell.alignment = styles.center_alignment  # Center alignment
+        cell.border = thin_border  # Apply thin border
+        cell.fill = fill  # Apply respective color
+
+    # Remarks keeps its own fonts instead of the sheet-wide Arial
+    layout.font_exempt_columns.add(remarks_column_index)
+    layout.set_font(10, remarks_column_index, styles.arial_black_font)
+
+    # **Data Rows**: SN numbers and every style that does not depend on the day's values
+    column_styles = {
+        1: (None, styles.center_alignment, None),  # SN
+        2: (yellow_fill, styles.center_alignment, None),  # Date
+        4: (styles.no_fill, styles.right_alignment, "0.0"),  # Public Holiday is NOT yellow
+    }
+    for col_num in [3, 5, 6, 7] + ([8] if ns_leave_present else []):  # At Work, leave columns and NS Leave
+        column_styles[col_num] = (yellow_fill, styles.right_alignment, "0.0")
+
+    for row in range(FIRST_DATA_ROW, last_data_row + 1):
+        layout.write(ws, row, 1, row - FIRST_DATA_ROW + 1)  # SN starts at 1, 2, 3...
+        for col_num, (fill, alignment, number_format) in column_styles.items():
+            cell = ws.cell(row=row, column=col_num)
+            cell.border = thin_border
+            cell.alignment = alignment
+            if fill is not None:
+                cell.fill = fill
+            if number_format is not None:
+                cell.number_format = number_format  # Ensure 1 decimal place
+        ws.cell(row=row, column=remarks_column_index).border = thin_border
+
+    for row in range(FIRST_DATA_ROW, LAST_REMARKS_ROW + 1):
+        ws.cell(row=row, column=remarks_column_index).alignment = styles.right_alignment
+        if row > last_data_row:
+            # Blank Remarks cells below the data rows keep the plain red Remarks font
+            layout.set_font(row, remarks_column_index, styles.red_font)
+
+    # **Total Row**
+    total_cell = layout.write(ws, current_row, 1, "Total")
+    total_cell.alignment = styles.center_alignment
+    total_cell.border = thin_border
+    layout.font_exempt_rows.add(current_row)  # The Total row only gets the fonts assigned below
+    layout.set_font(current_row, 1, styles.arial_bold_font)
+
+    for col_num in range(3, remarks_column_index):  # At Work ... Annual Leave / NS Leave
+        cell = ws.cell(row=current_row, column=col_num)
+        # Ensure total values remain **normal** (not bold)
+        layout.set_font(current_row, col_num, styles.arial_black_font)
+        cell.alignment = styles.right_alignment  # Apply right alignment
+        cell.border = thin_border  # Apply border to each cell
+        cell.number_format = "0.0"  # Ensure it's stored as a number (1 decimal place)
+
+    # Apply border to the label and Remarks columns
+    ws.cell(row=current_row, column=2).border = thin_border
+    ws.cell(row=current_row, column=remarks_column_index).border = thin_border
+
+    # **Signature Section**
+    # Merge Officer / Reporting Officer Fields (Name, Signature, Date) Across B, C, D
+    for offset in [2, 3, 4, 6, 7, 8]:
+        ws.merge_cells(f"B{current_row + offset}:D{current_row + offset}")
+
+    for offset, label in [(2, "Officer"), (3, "Signature"), (4, "Date"),
+                          (6, "Reporting Officer"), (7, "Signature"), (8, "Date")]:
+        layout.write(ws, current_row + offset, 1, label)
+    layout.write(ws, current_row + 7, 2, "")  # Leave Empty for Manager
+    layout.write(ws, current_row + 8, 2, "")  # Leave Empty for Manager
+
+    # **Apply Date Formatting**
+    ws[f"B{current_row + 4}"].number_format = "DD - MMM - YYYY"  # Ensure date appears correctly
+    ws[f"B{current_row + 8}"].number_format = "DD - MMM - YYYY"  # Format empty date field
+
+    # Apply Borders to A-D, bottom alignment, and keep column A left-aligned
+    for row in range(current_row + 2, current_row + 9):  # Covers Officer + Reporting Officer sections
+        for col in ["A", "B", "C", "D"]:
+            ws[f"{col}{row}"].border = thin_border
+            ws[f"{col}{row}"].alignment = styles.bottom_left_alignment if col == "A" else styles.bottom_center_alignment
+
+    # **Emit fonts (Arial 12 everywhere except Remarks and Total)**
+    layout.apply_fonts(ws)
+
+
+def get_template(ns_leave_present, days_in_month):
+    """Return the cached skeleton for this header variant, building it on first use."""
+    key = (ns_leave_present, days_in_month)
+    template = _TEMPLATES.get(key)
+    if template is None:
+        ws = Workbook().active
+        layout = SheetLayout(default_font=styles.arial_font)
+        build_skeleton(ws, layout, ns_leave_present, days_in_month)
+        template = _TEMPLATES[key] = SheetTemplate(ws, layout)
+        logger.info(f"Built timesheet template for NS Leave={ns_leave_present}, {days_in_month} days")
+    return template
+
+
+def invalidate_templates(reload_styles=False):
+    """
+    Drop every cached skeleton so the next timesheet rebuilds it.
+    Call this after changing styles.py; reload_styles=True also re-imports it in place.
+    """
+    if reload_styles:
+        importlib.reload(styles)
+    _TEMPLATES.clear()
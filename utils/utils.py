@@ -1,6 +1,15 @@
+import atexit
+import configparser
 import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
 
 USER_DATA_FILE = "config/user_details.json"
+USER_DB_FILE = "config/user_details.db"
+USER_JOURNAL_FILE = "config/user_details.journal.jsonl"
 PUBLIC_HOLIDAYS_FILE = "config/ph.json"
 
 # Load data from a JSON file
@@ -15,6 +24,30 @@ def load_json(file_path):
         print(f"Error decoding JSON in {file_path}: {e}")
         return {}
 
+# Write a JSON file atomically: readers, and the file left after a crash, only ever see the old or the new data
+def write_json_atomic(file_path, data):
+    directory = os.path.dirname(file_path) or "."
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as file:
+            json.dump(data, file, indent=4)
+            file.flush()
+            os.fsync(file.fileno())
+        # mkstemp creates the file readable by the owner only; keep the mode of the file it replaces
+        os.chmod(temp_path, os.stat(file_path).st_mode if os.path.exists(file_path) else 0o644)
+        os.replace(temp_path, file_path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+# (mtime, size) of a file, None when it does not exist
+def file_stamp(file_path):
+    try:
+        stat = os.stat(file_path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
 # Validate the structure of user details
 def validate_user_details(data):
     """Validate the user details JSON."""
@@ -24,24 +57,375 @@ def validate_user_details(data):
             print(f"User ID {user_id} is missing required keys: {required_keys - user_info.keys()}")
     return data
 
-# Ensure USER_DETAILS is initialized
-USER_DETAILS = {}
+# **User store**
+# Registered users as {user_id: {field: value}}, cached in memory by both backends
+class JSONUserStore:
+    """
+    The whole user file is re-read when it changes on disk. Changes made within `flush_delay` seconds
+    of each other are written together, as one atomic rewrite (temp file + rename).
+    """
+
+    def __init__(self, file_path, flush_delay=0.0):
+        self.file_path = file_path
+        self.flush_delay = flush_delay
+        self.lock = threading.RLock()  # Handlers and the flush timer thread share the cached users
+        self.users = {}
+        self.stamp = None  # (mtime, size) the cached users were read from or saved with
+        self.dirty = False  # Changes not written to the file yet
+        self.timer = None
+
+    def load_all(self):
+        with self.lock:
+            if self.dirty:
+                return self.users  # Pending changes are newer than the file
+            stamp = file_stamp(self.file_path)
+            if stamp is None or stamp != self.stamp:
+                self.users = validate_user_details(load_json(self.file_path))
+                self.stamp = stamp
+            return self.users
+
+    def save_all(self, users):
+        with self.lock:
+            self.users = users
+            self._changed()
+
+    def set_field(self, user_id, field, value):
+        with self.lock:
+            self.load_all().setdefault(user_id, {})[field] = value
+            self._changed()
+
+    def delete_user(self, user_id):
+        with self.lock:
+            if self.load_all().pop(user_id, None) is not None:
+                self._changed()
+
+    def _changed(self):
+        self.dirty = True
+        if self.flush_delay <= 0:
+            self.flush()
+        elif self.timer is None:  # The first change starts the window, later ones ride along
+            self.timer = threading.Timer(self.flush_delay, self.flush)
+            self.timer.daemon = True
+            self.timer.start()
+
+    def flush(self):
+        """Write pending changes now."""
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+            if self.dirty:
+                write_json_atomic(self.file_path, self.users)
+                self.stamp = file_stamp(self.file_path)
+                self.dirty = False
+
+
+class SQLiteUserStore:
+    """
+    One row per (user, field) in SQLite (WAL mode), so saving a changed field writes that row only.
+    The cache is re-read only when another connection has committed (PRAGMA data_version).
+    """
+    UPSERT = ("INSERT INTO user_fields VALUES (?, ?, ?) "
+              "ON CONFLICT (user_id, field) DO UPDATE SET value = excluded.value")
+
+    def __init__(self, db_path, json_path=None):
+        self.db_path = db_path
+        self.lock = threading.RLock()  # The connection and the cache are shared by every thread
+        self.connection = None
+        self.pid = None
+        self.users = None
+        self.saved = {}  # user_id -> copy of the fields as stored, to find what save_all() has to write
+        self.data_version = None
+        if json_path:
+            self.migrate_json(json_path)
+
+    def connect(self):
+        """The connection for this process (a connection must not be shared with forked batch workers)."""
+        if self.pid != os.getpid():
+            self.connection = sqlite3.connect(self.db_path, check_same_thread=False)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+            self.connection.executescript("""
+                CREATE TABLE IF NOT EXISTS user_fields (
+                    user_id TEXT NOT NULL, field TEXT NOT NULL, value TEXT NOT NULL, PRIMARY KEY (user_id, field));
+                CREATE TABLE IF NOT EXISTS store_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+            """)
+            self.pid = os.getpid()
+            self.users = None
+        return self.connection
+
+    def migrate_json(self, json_path):
+        """One-shot import of the JSON user file; later calls (and later edits of the file) are ignored."""
+        connection = self.connect()
+        if connection.execute("SELECT 1 FROM store_meta WHERE key = 'migrated_from'").fetchone():
+            return
+        users = load_json(json_path)
+        with connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO user_fields VALUES (?, ?, ?)",
+                [(user_id, field, json.dumps(value)) for user_id, profile in users.items()
+                 for field, value in profile.items()])
+            connection.execute("INSERT INTO store_meta VALUES ('migrated_from', ?)", (json_path,))
+        self.users = None
+        print(f"Migrated {len(users)} user(s) from {json_path} to {self.db_path}")
+
+    def load_all(self):
+        with self.lock:
+            connection = self.connect()
+            data_version = connection.execute("PRAGMA data_version").fetchone()[0]
+            if self.users is None or data_version != self.data_version:
+                users = {}
+                for user_id, field, value in connection.execute(
+                        "SELECT user_id, field, value FROM user_fields ORDER BY rowid"):
+                    users.setdefault(user_id, {})[field] = json.loads(value)
+                self.users = validate_user_details(users)
+                self.saved = {user_id: dict(profile) for user_id, profile in users.items()}
+                self.data_version = data_version
+            return self.users
+
+    def save_all(self, users):
+        """Write only the fields and users that differ from what is stored."""
+        with self.lock:
+            self.load_all()
+            upserts, deleted_fields = [], []
+            for user_id, profile in users.items():
+                saved = self.saved.get(user_id, {})
+                if profile == saved:
+                    continue
+                upserts += [(user_id, field, json.dumps(value)) for field, value in profile.items()
+                            if field not in saved or saved[field] != value]
+                deleted_fields += [(user_id, field) for field in saved if field not in profile]
+            deleted_users = [(user_id,) for user_id in self.saved if user_id not in users]
+
+            with self.connect() as connection:
+                connection.executemany(self.UPSERT, upserts)
+                connection.executemany("DELETE FROM user_fields WHERE user_id = ? AND field = ?", deleted_fields)
+                connection.executemany("DELETE FROM user_fields WHERE user_id = ?", deleted_users)
+            self.users = users
+            self.saved = {user_id: dict(profile) for user_id, profile in users.items()}
+
+    def set_field(self, user_id, field, value):
+        """Upsert a single field (creating the user if needed)."""
+        with self.lock:
+            self.load_all()
+            with self.connect() as connection:
+                connection.execute(self.UPSERT, (user_id, field, json.dumps(value)))
+            self.users.setdefault(user_id, {})[field] = value
+            self.saved.setdefault(user_id, {})[field] = value
+
+    def delete_user(self, user_id):
+        with self.lock:
+            self.load_all()
+            with self.connect() as connection:
+                connection.execute("DELETE FROM user_fields WHERE user_id = ?", (user_id,))
+            self.users.pop(user_id, None)
+            self.saved.pop(user_id, None)
+
+    def flush(self):
+        """Nothing to do: every change is committed straight away."""
+
+
+class JournalUserStore:
+    """
+    The JSON user file is a snapshot; every change after it is appended to a JSONL journal as one line
+        {"ts": ..., "op": "set", "user_id": ..., "field": ..., "value": ...}
+        {"ts": ..., "op": "unset", "user_id": ..., "field": ...}
+        {"ts": ..., "op": "delete", "user_id": ...}
+    and replayed over the snapshot on load. Once the journal passes `compact_bytes` the users are written
+    to the snapshot and the journal is moved to the end of `<journal>.history`, which keeps the full audit
+    trail of profile changes (see history()).
+    """
+
+    def __init__(self, snapshot_path, journal_path, compact_bytes=1024 * 1024):
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path
+        self.history_path = f"{journal_path}.history"
+        self.compact_bytes = compact_bytes
+        self.lock = threading.RLock()
+        self.journal = None
+        self.pid = None
+        self.users = None
+        self.saved = {}  # user_id -> copy of the fields as journaled, to find what save_all() has to append
+        self.stamps = None  # (snapshot, journal) stamps the cached users were read from or written with
+
+    def _stamps(self):
+        return file_stamp(self.snapshot_path), file_stamp(self.journal_path)
+
+    def load_all(self):
+        with self.lock:
+            stamps = self._stamps()
+            if self.users is None or stamps != self.stamps:
+                users = load_json(self.snapshot_path)
+                for entry in self._read_journal(self.journal_path):
+                    self._apply(users, entry)
+                self.users = validate_user_details(users)
+                self.saved = {user_id: dict(profile) for user_id, profile in users.items()}
+                self.stamps = stamps
+            return self.users
+
+    @staticmethod
+    def _read_journal(file_path):
+        """Journal entries in order; a torn last line (crash during an append) is skipped."""
+        try:
+            with open(file_path, "r", encoding="utf-8") as file:
+                lines = [line for line in file.read().split("\n") if line]
+        except FileNotFoundError:
+            return
+        try:  # One decode for the whole journal is much faster than one per line
+            yield from json.loads(f"[{','.join(lines)}]")
+            return
+        except json.JSONDecodeError:
+            pass
+        for number, line in enumerate(lines, 1):
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                print(f"Skipping unreadable line {number} of {file_path}")
+
+    def _ends_with_newline(self):
+        with open(self.journal_path, "rb") as file:
+            file.seek(-1, os.SEEK_END)
+            return file.read(1) == b"\n"
+
+    @staticmethod
+    def _apply(users, entry):
+        op, user_id = entry["op"], entry["user_id"]
+        if op == "set":
+            users.setdefault(user_id, {})[entry["field"]] = entry["value"]
+        elif op == "unset":
+            users.get(user_id, {}).pop(entry["field"], None)
+        elif op == "delete":
+            users.pop(user_id, None)
+
+    def _append(self, entries):
+        """Append entries (and apply them to the cache); one write per call."""
+        if not entries:
+            return
+        if self.pid != os.getpid():  # Forked batch workers open their own handle
+            self.journal = open(self.journal_path, "a", encoding="utf-8")
+            self.pid = os.getpid()
+            if self.journal.tell() and not self._ends_with_newline():
+                self.journal.write("\n")  # Keep a torn last line from swallowing the next entry
+        ts = time.strftime("%Y-%m-%dT%H:%M:%S")
+        self.journal.write("".join(json.dumps({"ts": ts, **entry}) + "\n" for entry in entries))
+        self.journal.flush()
+        for entry in entries:
+            self._apply(self.users, entry)
+            self._apply(self.saved, entry)
+        self.stamps = self._stamps()
+        if self.stamps[1][1] >= self.compact_bytes:
+            self.compact()
+
+    def save_all(self, users):
+        """Append only the fields and users that differ from what is journaled."""
+        with self.lock:
+            self.load_all()
+            entries = []
+            for user_id, profile in users.items():
+                saved = self.saved.get(user_id, {})
+                if profile == saved:
+                    continue
+                entries += [{"op": "set", "user_id": user_id, "field": field, "value": value}
+                            for field, value in profile.items() if field not in saved or saved[field] != value]
+                entries += [{"op": "unset", "user_id": user_id, "field": field}
+                            for field in saved if field not in profile]
+            entries += [{"op": "delete", "user_id": user_id} for user_id in self.saved if user_id not in users]
+            self.users = users
+            self._append(entries)
+
+    def set_field(self, user_id, field, value):
+        with self.lock:
+            self.load_all()
+            self._append([{"op": "set", "user_id": user_id, "field": field, "value": value}])
+
+    def delete_user(self, user_id):
+        with self.lock:
+            if user_id in self.load_all():
+                self._append([{"op": "delete", "user_id": user_id}])
+
+    def compact(self):
+        """Write the users to the snapshot and move the journal to the history file."""
+        with self.lock:
+            users = self.load_all()
+            write_json_atomic(self.snapshot_path, users)
+            # Replaying the journal over the new snapshot changes nothing, so a crash from here on is harmless
+            if self.journal is not None:
+                self.journal.close()
+                self.journal, self.pid = None, None
+            if os.path.exists(self.journal_path):
+                with open(self.journal_path, "rb") as journal, open(self.history_path, "ab") as history:
+                    history.write(journal.read())
+                open(self.journal_path, "w").close()
+            self.stamps = self._stamps()
+
+    def history(self, user_id=None):
+        """Every journaled change (of one user, or of everyone), oldest first."""
+        with self.lock:
+            if self.journal is not None:
+                self.journal.flush()
+            return [entry for file_path in (self.history_path, self.journal_path)
+                    for entry in self._read_journal(file_path) if user_id is None or entry["user_id"] == user_id]
+
+    def flush(self):
+        with self.lock:
+            if self.journal is not None and self.pid == os.getpid():
+                self.journal.flush()
+                os.fsync(self.journal.fileno())
+
+
+# Backend from the [users] section of config.ini: sqlite (default), json or journal
+config = configparser.ConfigParser()
+config.read("config/config.ini")
+USER_STORE = config.get("users", "STORE", fallback="sqlite")
+
+def create_user_store():
+    if USER_STORE == "json":
+        return JSONUserStore(USER_DATA_FILE, flush_delay=config.getint("users", "FLUSH_DELAY_MS", fallback=5) / 1000)
+    if USER_STORE == "journal":
+        # user_details.json is the snapshot the journal is replayed over
+        return JournalUserStore(USER_DATA_FILE, config.get("users", "JOURNAL_FILE", fallback=USER_JOURNAL_FILE),
+                                compact_bytes=config.getint("users", "COMPACT_BYTES", fallback=1024 * 1024))
+    # user_details.json is imported into the database the first time it is opened
+    return SQLiteUserStore(config.get("users", "DB_FILE", fallback=USER_DB_FILE), json_path=USER_DATA_FILE)
+
+# Created on first use rather than on import, so importing this module never creates or migrates anything
+user_store = None
+_user_store_lock = threading.Lock()
+
+def get_user_store():
+    global user_store
+    if user_store is None:
+        with _user_store_lock:
+            if user_store is None:
+                user_store = create_user_store()
+    return user_store
+
+atexit.register(lambda: user_store is not None and user_store.flush())  # Write changes still waiting for their flush
 
 # Load and store USER_DETAILS globally
 def load_user_details():
-    """Reload USER_DETAILS from the JSON file."""
+    """Return USER_DETAILS from the user store (cached; re-read only when the stored data changed)."""
     global USER_DETAILS  # Declare before using
-    USER_DETAILS = validate_user_details(load_json(USER_DATA_FILE))  # Assign instead of clearing
-    return USER_DETAILS  # Return updated dictionary
+    USER_DETAILS = get_user_store().load_all()
+    return USER_DETAILS  # Shared dictionary: change it only to save it with save_user_data()
 
-# Save user data to JSON
+# Save user data
 def save_user_data(updated_user_details):
-    """Save USER_DETAILS back to JSON file."""
-    with open(USER_DATA_FILE, "w") as file:
-        json.dump(updated_user_details, file, indent=4)
+    """Save USER_DETAILS back to the user store (set_user_field() is cheaper for a single answer)."""
+    global USER_DETAILS
+    get_user_store().save_all(updated_user_details)
+    USER_DETAILS = updated_user_details
 
-# Initialize USER_DETAILS on import
-USER_DETAILS = load_user_details()  # Ensures it is accessible for imports
+# Save one profile field, e.g. a single registration answer
+def set_user_field(user_id, field, value):
+    get_user_store().set_field(user_id, field, value)
+
+# Remove a user's profile
+def delete_user(user_id):
+    get_user_store().delete_user(user_id)
+
+# Filled by load_user_details() (the user store is only opened when the users are first needed)
+USER_DETAILS = {}
 
-# Load other configurations
+# Load other configurations (kept up to date by holiday_calendar)
 PUBLIC_HOLIDAYS = load_json(PUBLIC_HOLIDAYS_FILE)